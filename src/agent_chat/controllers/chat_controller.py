@@ -11,6 +11,14 @@ class ChatController:
         self.messages.append(("bot", response))
         return response
 
+    def send_user_messages(self, texts: list[str]):
+        """Bulk variant of send_user_message (e.g. reprocessing chat logs)."""
+        responses = self.model.get_responses(texts)
+        for text, response in zip(texts, responses):
+            self.messages.append(("user", text))
+            self.messages.append(("bot", response))
+        return responses
+
     def get_messages(self):
         return self.messages
 
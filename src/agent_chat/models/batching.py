@@ -0,0 +1,169 @@
+"""
+Micro-batching scheduler in front of the intent model.
+
+Concurrent callers submit single sentences; a background thread groups them
+and runs one batched forward pass per flush. A flush happens as soon as
+`max_batch_size` requests are queued or the oldest queued request has waited
+`max_wait_ms`, whichever comes first.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Generic, List, Tuple, TypeVar
+import asyncio
+import queue
+import threading
+import time
+
+T = TypeVar("T")
+
+
+@dataclass
+class BatcherStats:
+    max_batch_size: int
+    max_wait_ms: float
+    max_queue: int
+    queue_depth: int = 0
+    peak_queue_depth: int = 0
+    requests: int = 0
+    rejected: int = 0
+    batches: int = 0
+    full_flushes: int = 0  # flushed because the batch filled up
+    timeout_flushes: int = 0  # flushed because max_wait_ms elapsed
+    errors: int = 0
+    total_wait_ms: float = 0.0  # sum of queueing delay over all requests
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return self.total_wait_ms / self.requests if self.requests else 0.0
+
+
+class MicroBatcher(Generic[T]):
+    """Queue single predictions and resolve them from batched calls.
+
+    `predict_many` receives a list of sentences and must return one result per
+    sentence, in order (e.g. `IntentModel.predict_tags`).
+    """
+
+    def __init__(self, predict_many: Callable[[List[str]], List[T]], *,
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0, max_queue: int = 1024):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self.predict_many = predict_many
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self._queue: queue.Queue[Tuple[str, Future, float] | None] = queue.Queue(maxsize=max_queue)
+        self._stats = BatcherStats(max_batch_size, max_wait_ms, max_queue)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="intent-batcher", daemon=True)
+        self._thread.start()
+
+    # ---- Public API ----
+    def submit(self, sentence: str) -> "Future[T]":
+        """Enqueue a sentence; raises RuntimeError if closed or the queue is full."""
+        if self._closed:
+            raise RuntimeError("Batcher is closed")
+        fut: Future[T] = Future()
+        try:
+            self._queue.put_nowait((sentence, fut, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self._stats.rejected += 1
+            raise RuntimeError("Batcher queue is full") from None
+        with self._lock:
+            depth = self._queue.qsize()
+            self._stats.peak_queue_depth = max(self._stats.peak_queue_depth, depth)
+        return fut
+
+    def predict(self, sentence: str, timeout: float | None = None) -> T:
+        """Blocking single prediction served from a shared batch."""
+        return self.submit(sentence).result(timeout)
+
+    async def predict_async(self, sentence: str) -> T:
+        return await asyncio.wrap_future(self.submit(sentence))
+
+    def stats(self) -> BatcherStats:
+        with self._lock:
+            snap = replace(self._stats)
+        snap.queue_depth = self._queue.qsize()
+        return snap
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stop accepting requests, flush what is queued and join the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "MicroBatcher[T]":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ---- Worker ----
+    def _collect(self, first: Tuple[str, Future, float]) -> Tuple[List[Tuple[str, Future, float]], bool, bool]:
+        """Gather up to max_batch_size items; returns (batch, filled, stop)."""
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False, False
+            if item is None:
+                return batch, False, True
+            batch.append(item)
+        return batch, True, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, filled, stop = self._collect(first)
+            # Skip requests whose callers gave up (cancelled futures)
+            live = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            started = time.perf_counter()
+            error: BaseException | None = None
+            results: List[T] = []
+            if live:
+                try:
+                    results = list(self.predict_many([s for s, _, _ in live]))
+                    if len(results) != len(live):
+                        raise RuntimeError("predict_many returned a wrong number of results")
+                except BaseException as e:  # resolve every caller, never kill the worker
+                    error = e
+            for i, (_, fut, _) in enumerate(live):
+                if error is None:
+                    fut.set_result(results[i])
+                else:
+                    fut.set_exception(error)
+            with self._lock:
+                st = self._stats
+                st.batches += 1
+                st.requests += len(batch)
+                st.full_flushes += int(filled)
+                st.timeout_flushes += int(not filled)
+                st.errors += int(error is not None)
+                st.total_wait_ms += sum((started - t0) * 1000.0 for _, _, t0 in batch)
+        # Requests that raced with close() never get a batch
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("Batcher is closed"))
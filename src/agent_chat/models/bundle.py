@@ -0,0 +1,118 @@
+"""
+Single-file, mmap-able model bundle.
+
+Layout (all offsets are absolute and 64-byte aligned):
+
+    magic (8 bytes) | header length (uint32 LE) | header JSON | padding | arrays...
+
+The JSON header describes every array (offset, shape, dtype) plus free-form
+metadata. Reading maps the file once with `np.memmap` and returns read-only
+views into it, so loading is zero-copy: no pickle, no Keras deserialization,
+and pages are only faulted in when touched.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"ACHATBND"
+FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".bundle"
+_ALIGN = 64
+_PREFIX = struct.Struct("<8sI")
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def write_bundle(path: str | Path, arrays: Mapping[str, np.ndarray], meta: Dict[str, Any] | None = None) -> Path:
+    """Write arrays + metadata atomically (tmp file + rename)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+    for name, arr in arrays.items():
+        if arr.dtype.hasobject:
+            raise TypeError(f"Array {name!r} has object dtype; only plain arrays can be bundled")
+
+    # The header size depends on the offsets, which depend on the header size:
+    # reserve generously and grow until it fits.
+    reserve = _aligned(_PREFIX.size + 256 + 96 * len(arrays) + len(json.dumps(meta or {})))
+    while True:
+        offset = reserve
+        layout: Dict[str, Dict[str, Any]] = {}
+        for name, arr in arrays.items():
+            layout[name] = {"offset": offset, "shape": list(arr.shape), "dtype": arr.dtype.str}
+            offset = _aligned(offset + arr.nbytes)
+        header = json.dumps(
+            {"format_version": FORMAT_VERSION, "arrays": layout, "meta": meta or {}},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        if _PREFIX.size + len(header) <= reserve:
+            break
+        reserve = _aligned(_PREFIX.size + len(header))
+
+    tmp = p.with_name(p.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(layout[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(max(offset, reserve))
+    os.replace(tmp, p)
+    return p
+
+
+@dataclass
+class Bundle:
+    path: Path
+    meta: Dict[str, Any]
+    arrays: Dict[str, np.ndarray]  # read-only views into the mapped file
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays.values())
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+
+def read_bundle(path: str | Path, *, mmap: bool = True) -> Bundle:
+    p = Path(path)
+    with p.open("rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"Not a model bundle: {p}")
+        magic, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"Not a model bundle: {p}")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle version: {header.get('format_version')}")
+
+    raw = np.memmap(p, dtype=np.uint8, mode="r") if mmap else np.fromfile(p, dtype=np.uint8)
+    arrays: Dict[str, np.ndarray] = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape: Tuple[int, ...] = tuple(spec["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        start = spec["offset"]
+        arr = raw[start:start + count * dtype.itemsize].view(dtype).reshape(shape)
+        arr.flags.writeable = False
+        arrays[name] = arr
+    return Bundle(path=p, meta=header.get("meta", {}), arrays=arrays)
+
+
+def string_array(values: List[str]) -> np.ndarray:
+    """Fixed-width unicode array (bundle friendly, searchable with searchsorted)."""
+    return np.array(list(values), dtype=str)
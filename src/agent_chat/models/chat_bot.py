@@ -1,13 +1,40 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import time
 
+from .batching import BatcherStats, MicroBatcher
+from .cache import CacheStats
 from .nlp import (
+    ResponseStore,
     load_intents,
     load_artifacts,
-    respond_from_intents,
 )
+from .pool import DEFAULT_BUDGET_BYTES, ModelPool, PoolStats, artifact_key
+
+INTENTS_PATH = Path("storage/intents.json")
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """What answers requests: model and responses, swapped as one object."""
+
+    intent_model: Any = None
+    responses: Optional[ResponseStore] = None
+
+
+@dataclass(frozen=True)
+class ModelLoadEvent:
+    """Outcome of a model load, passed to the load listeners."""
+
+    path: Optional[str]
+    ok: bool
+    elapsed_ms: float
+    error: Optional[str] = None
 
 
 class ChatBotModel:
@@ -17,38 +44,144 @@ class ChatBotModel:
     return a generic message.
     """
 
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, wordnet_fallback: bool = False,
+                 pool_budget_bytes: int = DEFAULT_BUDGET_BYTES):
         # Active artifacts
         self.model_path: Optional[str] = None
-        self._intent_model = None  # loaded keras + vocab
-        self._intents_data = None  # loaded intents.json to pick responses
+        self.backend = backend  # inference engine passed to load_artifacts
+        self.wordnet_fallback = wordnet_fallback  # lemmas missing from the bundle table
+        # Loaded model + compiled responses; readers take one reference to it
+        self._active = ModelSnapshot()
+        self._load_lock = threading.Lock()
+        self._load_generation = 0
+        self._loader: Optional[ThreadPoolExecutor] = None
+        self._load_listeners: List[Callable[[ModelLoadEvent], None]] = []
+        self.last_load: Optional[ModelLoadEvent] = None
+        # Recently used models stay resident, so switching back skips the disk
+        self.model_pool = ModelPool(lambda path, **kw: load_artifacts(path, **kw),
+                                    budget_bytes=pool_budget_bytes)
+        # Responses compiled from INTENTS_PATH, keyed on its mtime/size and the classes
+        self._compiled_responses: Optional[Tuple[Any, ResponseStore]] = None
         # Custom meta for display/testing
         self.custom_version: int = 0
         self.custom_label: str = ""
         # Whether to use generated (custom) model vs local/manual
         self.use_generated: bool = False
+        # Optional micro-batching of concurrent predictions
+        self._batcher: Optional[MicroBatcher] = None
+        # Optional multi-process inference (see workers.WorkerPool)
+        self._workers = None
+        self._worker_processes: int = 0
 
     # Initial state is provided by UI via client_storage restore
     # (no file-based persistence here)
 
+    @property
+    def _intent_model(self):
+        return self._active.intent_model
+
+    @_intent_model.setter
+    def _intent_model(self, intent_model):
+        self._active = replace(self._active, intent_model=intent_model)
+
+    @property
+    def _responses(self) -> Optional[ResponseStore]:
+        return self._active.responses
+
+    @_responses.setter
+    def _responses(self, responses: Optional[ResponseStore]):
+        self._active = replace(self._active, responses=responses)
+
     # ---- Configuration API ----
     def set_model_path(self, path: Optional[str]):
-        """Set and attempt to load model + sidecars. If fails, keep fallback."""
-        self.model_path = path
-        self._intent_model = None
-        if not path:
+        """Load model + sidecars and swap them in. If it fails, keep the current model."""
+        generation = self._next_generation()
+        self._load(path, generation)
+
+    def load_model_async(self, path: Optional[str]) -> Future:
+        """Load ``path`` on a background thread; the result is its ModelLoadEvent.
+
+        The current model keeps answering until the new one is fully built.
+        When several loads overlap, only the most recent request is swapped in.
+        """
+        generation = self._next_generation()
+        with self._load_lock:
+            if self._loader is None:
+                self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            return self._loader.submit(self._load, path, generation)
+
+    def add_load_listener(self, listener: Callable[[ModelLoadEvent], None]):
+        """Call ``listener(event)`` after every load attempt (on the loading thread)."""
+        self._load_listeners.append(listener)
+
+    def remove_load_listener(self, listener: Callable[[ModelLoadEvent], None]):
+        if listener in self._load_listeners:
+            self._load_listeners.remove(listener)
+
+    def _next_generation(self) -> int:
+        with self._load_lock:
+            self._load_generation += 1
+            return self._load_generation
+
+    def _load(self, path: Optional[str], generation: int) -> ModelLoadEvent:
+        started = time.perf_counter()
+        error: Optional[str] = None
+        snapshot = ModelSnapshot(responses=self._responses)
+        if path:
+            try:
+                intent_model = self.model_pool.get(path, backend=self.backend,
+                                                   wordnet_fallback=self.wordnet_fallback)
+                responses = self._responses_for(getattr(intent_model, "classes", None))
+                if responses is None:
+                    responses = snapshot.responses
+                snapshot = ModelSnapshot(intent_model, responses)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        event = ModelLoadEvent(path, error is None, (time.perf_counter() - started) * 1000.0, error)
+        if event.ok:
+            self._swap(path, snapshot, generation)
+        self.last_load = event
+        for listener in list(self._load_listeners):
+            try:
+                listener(event)
+            except Exception:
+                pass
+        return event
+
+    def _responses_for(self, classes) -> Optional[ResponseStore]:
+        """Responses from the intents file colocated in the project, compiled once per version."""
+        fingerprint = artifact_key(INTENTS_PATH)
+        if fingerprint is None:
+            return None
+        key = (fingerprint, tuple(classes) if classes is not None else None)
+        cached = self._compiled_responses
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        responses = ResponseStore.from_intents(load_intents(INTENTS_PATH), classes)
+        self._compiled_responses = (key, responses)
+        return responses
+
+    def _swap(self, path: Optional[str], snapshot: ModelSnapshot, generation: int):
+        with self._load_lock:
+            if generation != self._load_generation:
+                return  # a newer load was requested meanwhile
+            previous, self._active = self._active, snapshot
+            self.model_path = path
+        old = previous.intent_model
+        if old is not None and old is not snapshot.intent_model and not self.model_pool.holds(old):
+            # Cached probabilities belong to the previous weights
+            old.clear_cache()
+        if self._worker_processes:
+            # Re-pack the new weights for the worker processes
+            self._restart_workers()
+
+    def set_intents(self, intents_data: Optional[dict]):
+        """Compile the responses of ``intents_data``; the parsed dict is not kept."""
+        if intents_data is None:
+            self._responses = None
             return
-        try:
-            # Try to load intents file colocated in project
-            intents_path = Path("storage/intents.json")
-            if intents_path.exists():
-                self._intents_data = load_intents(intents_path)
-            self._intent_model = load_artifacts(path)
-        except Exception:
-            # Keep fallback
-            self._intent_model = None
-        finally:
-            pass
+        classes = getattr(self._intent_model, "classes", None)
+        self._responses = ResponseStore.from_intents(intents_data, classes)
 
     def set_custom_meta(self, *, version: int | None = None, label: str | None = None):
         if version is not None:
@@ -68,10 +201,73 @@ class ChatBotModel:
         # UI layer persists via client_storage
     # (Persistence is handled by ConfigView via Flet client_storage)
 
+    # ---- Worker processes ----
+    def start_workers(self, processes: int):
+        """Run inference in N processes sharing the active model's weights."""
+        self._worker_processes = max(1, int(processes))
+        return self._restart_workers()
+
+    def stop_workers(self):
+        self._worker_processes = 0
+        workers, self._workers = self._workers, None
+        if workers is not None:
+            workers.close()
+
+    def _restart_workers(self):
+        from .workers import WorkerPool  # import lazily: spawns processes
+
+        workers, self._workers = self._workers, None
+        if workers is not None:
+            workers.close()
+        if self._intent_model is not None:
+            self._workers = WorkerPool(self._intent_model, self._worker_processes)
+        return self._workers
+
+    def _predictor(self, active: Optional[ModelSnapshot] = None):
+        if self._workers is not None:
+            return self._workers
+        return (active or self._active).intent_model
+
+    # ---- Micro-batching ----
+    def enable_batching(self, *, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                        max_queue: int = 1024) -> MicroBatcher:
+        """Serve concurrent get_response calls from shared batched predictions."""
+        self.disable_batching()
+        self._batcher = MicroBatcher(
+            self._predict_tags,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue=max_queue,
+        )
+        return self._batcher
+
+    def disable_batching(self):
+        batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+
+    def batching_stats(self) -> Optional[BatcherStats]:
+        return self._batcher.stats() if self._batcher is not None else None
+
+    def pool_stats(self) -> PoolStats:
+        return self.model_pool.stats()
+
+    def cache_stats(self) -> Dict[str, CacheStats]:
+        """Hit/miss counters of the active model's caches (empty if none)."""
+        return self._intent_model.cache_stats() if self._intent_model is not None else {}
+
+    def _predict_tags(self, sentences: List[str]):
+        # Resolved at flush time so batches follow model switches
+        predictor = self._predictor()
+        if predictor is None:
+            raise RuntimeError("No active model")
+        return predictor.predict_tags(sentences)
+
     # ---- Inference ----
     def has_active_model(self) -> bool:
         """Return True if a model and its intents are loaded and usable."""
-        return self._intent_model is not None and self._intents_data is not None
+        active = self._active
+        return active.intent_model is not None and active.responses is not None
 
     def get_response(self, message: str) -> str:
         text = (message or "").strip()
@@ -79,13 +275,38 @@ class ChatBotModel:
             return "Please write a message."
 
         # Try neural model
-        if self._intent_model is not None and self._intents_data is not None:
+        active = self._active
+        if active.intent_model is not None and active.responses is not None:
             try:
-                tag = self._intent_model.predict_tag(text)
-                return respond_from_intents(tag, self._intents_data)
+                batcher = self._batcher
+                if batcher is not None:
+                    tag, _prob = batcher.predict(text)
+                else:
+                    tag = self._predictor(active).predict_tag(text)
+                return active.responses.respond(tag)
             except Exception as e:
                 # If model inference fails, drop to fallback
                 pass
+        return self._fallback_response(text)
+
+    def get_responses(self, messages: List[str]) -> List[str]:
+        """Answer many messages at once with a single batched model call."""
+        texts = [(m or "").strip() for m in messages]
+        replies: List[Optional[str]] = [None if t else "Please write a message." for t in texts]
+        pending = [i for i, t in enumerate(texts) if t]
+
+        active = self._active
+        if pending and active.intent_model is not None and active.responses is not None:
+            try:
+                tags = self._predictor(active).predict_tags([texts[i] for i in pending])
+                for i, (tag, _prob) in zip(pending, tags):
+                    replies[i] = active.responses.respond(tag)
+            except Exception:
+                # If model inference fails, drop to fallback
+                pass
+        return [r if r is not None else self._fallback_response(t) for r, t in zip(replies, texts)]
+
+    def _fallback_response(self, text: str) -> str:
         # Lightweight keyword-based fallback
         low = text.lower()
         if any(k in low for k in ("hello", "hi", "hey")):
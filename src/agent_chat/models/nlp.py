@@ -7,67 +7,360 @@ functions and classes suitable for MVC usage and unit testing.
 Notes:
 - Heavy deps (TensorFlow / Keras backend) might be unavailable in some envs.
   Training will raise a RuntimeError in that case so the UI can degrade
-  gracefully. Loading a pre-trained model also requires a compatible backend.
+  gracefully. Loading a pre-trained model with the "keras" backend also
+  requires a compatible backend; the "numpy" backend only needs h5py.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from types import MappingProxyType
+from typing import List, Tuple, Dict, Any, Callable, Iterable, Iterator, Mapping, Sequence, TypeVar
+import functools
+import hashlib
+import io
+import itertools
 import json
+import os
 import pickle
+import queue
 import random
+import re
+import sys
+import threading
+import time
+import zipfile
+import zlib
 
 import numpy as np
 
 import nltk
 from nltk.stem import WordNetLemmatizer
 
+from .bundle import BUNDLE_SUFFIX, read_bundle, string_array, write_bundle
+from .bundle import FORMAT_VERSION as BUNDLE_FORMAT_VERSION
+from .cache import CacheStats, LRUCache
+from .registry import (DEFAULT_KEEP, MODEL_SUFFIXES, ModelRegistry, RegistryEntry, append_lines, file_hash,
+                       intents_hash)
+
+
+T = TypeVar("T")
+
 
 # ---------- NLTK helpers ----------
 
-_NLTK_READY = False
+# name -> nltk.data path; "punkt_tab" is what word_tokenize loads on NLTK >= 3.9
+_NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+}
+TOKENIZER_RESOURCES = ("punkt", "punkt_tab")
+_NLTK_READY: set = set()
 
 
-def ensure_nltk() -> None:
-    global _NLTK_READY
-    if _NLTK_READY:
-        return
-    try:
-        nltk.data.find("tokenizers/punkt")
-        nltk.data.find("corpora/wordnet")
-        nltk.data.find("corpora/omw-1.4")
-        _NLTK_READY = True
-        return
-    except LookupError:
-        pass
-    nltk.download("punkt", quiet=True)
-    nltk.download("wordnet", quiet=True)
-    nltk.download("omw-1.4", quiet=True)
-    _NLTK_READY = True
+def ensure_nltk(*resources: str) -> None:
+    """Make sure NLTK data is available, downloading what is missing.
+
+    Without arguments, checks everything training needs (tokenizer + WordNet).
+    Note that a download is a network call.
+    """
+    for name in resources or tuple(_NLTK_RESOURCES):
+        if name in _NLTK_READY:
+            continue
+        try:
+            nltk.data.find(_NLTK_RESOURCES[name])
+        except LookupError:
+            nltk.download(name, quiet=True)
+        _NLTK_READY.add(name)
 
 
 lemmatizer = WordNetLemmatizer()
 
+# Punctuation left out of the features (vocabulary and hashed columns alike)
+IGNORE_TOKENS = frozenset({"?", "!", "¿", ".", ","})
+
+
+# ---------- Tokenizers ----------
+
+# Fast path approximating nltk.word_tokenize (Treebank rules) for chat-sized
+# text without loading Punkt: numbers, abbreviations, "n't"/clitic splits,
+# words with inner hyphens/apostrophes/dots, then any other single symbol.
+_CLITICS = r"'(?:s|m|d|re|ve|ll)\b"
+_TOKEN_RE = re.compile(
+    r"""
+    \.\.\.                                  # ellipsis
+    | \d+(?:[.,]\d+)+                         # 3.14, 1,000
+    | (?:[^\W\d_]\.){2,}                       # U.S.
+    | [¿¡]?\w+(?=n't\b)                        # "do" in don't
+    | n't\b
+    | """ + _CLITICS + r"""                   # 's 're 'll ...
+    | [¿¡]?\w+(?:-\w+|'(?!(?:s|m|d|re|ve|ll|t)\b)\w+|\.\w+)*
+    | \S
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_OPENERS = " \t\n([{<"
+
+
+def regex_tokenize(text: str) -> List[str]:
+    """Compiled-regex tokenizer; needs no NLTK data."""
+    tokens: List[str] = []
+    for m in _TOKEN_RE.finditer(text):
+        tok = m.group()
+        if tok == '"':
+            # Treebank renders quotes as `` (opening) and '' (closing)
+            start = m.start()
+            tok = "``" if start == 0 or text[start - 1] in _OPENERS else "''"
+        tokens.append(tok)
+    return tokens
+
+
+def nltk_tokenize(text: str) -> List[str]:
+    """Punkt sentence splitting + Treebank word tokenization."""
+    ensure_nltk(*TOKENIZER_RESOURCES)
+    return nltk.word_tokenize(text)
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    "nltk": nltk_tokenize,
+    "regex": regex_tokenize,
+}
+DEFAULT_TOKENIZER = "nltk"
+
+
+def get_tokenizer(tokenizer: str | Callable[[str], List[str]] | None = None) -> Callable[[str], List[str]]:
+    if tokenizer is None:
+        tokenizer = DEFAULT_TOKENIZER
+    if callable(tokenizer):
+        return tokenizer
+    try:
+        return TOKENIZERS[tokenizer]
+    except KeyError:
+        raise ValueError(f"Unknown tokenizer: {tokenizer!r} (expected one of {tuple(TOKENIZERS)})") from None
+
+
+def tokenize(text: str, tokenizer: str | Callable[[str], List[str]] | None = None) -> List[str]:
+    """Tokenize only (never needs WordNet)."""
+    return get_tokenizer(tokenizer)(text)
+
 
-def tokenize_and_lemmatize(text: str) -> List[str]:
+def tokenize_and_lemmatize(text: str, tokenizer: str | Callable[[str], List[str]] | None = None) -> List[str]:
     ensure_nltk()
-    tokens = nltk.word_tokenize(text)
+    tokens = tokenize(text, tokenizer)
     return [lemmatizer.lemmatize(tok.lower()) for tok in tokens]
 
 
-def bag_of_words(sentence: str, words_vocab: List[str]) -> np.ndarray:
-    """Convert sentence into a BoW vector aligned to words_vocab ordering."""
-    tokens = tokenize_and_lemmatize(sentence)
-    bag = np.zeros(len(words_vocab), dtype=np.float32)
-    vocab_index = {w: i for i, w in enumerate(words_vocab)}
-    for t in tokens:
-        i = vocab_index.get(t)
-        if i is not None:
-            bag[i] = 1.0
+class TextAnalyzer:
+    """Tokenize + lemmatize with bounded LRU caches.
+
+    Whole messages and single tokens are cached separately, so repeated
+    messages skip all work and new messages reuse known tokens. With a
+    `lemmas` table WordNet is only consulted for unknown tokens when
+    `wordnet_fallback` is set; without one every token goes through WordNet.
+    `wordnet_fallback` may be a callable, read on every call, so the owner
+    (e.g. `IntentModel`) can toggle it later.
+    """
+
+    def __init__(self, tokenizer: str | Callable[[str], List[str]] | None = None,
+                 lemmas: Mapping[str, str] | None = None, *,
+                 wordnet_fallback: bool | Callable[[], bool] = False, cache_size: int = 4096):
+        self.tokenizer = get_tokenizer(tokenizer)
+        self.lemmas = lemmas
+        self.wordnet_fallback = wordnet_fallback
+        self.messages: LRUCache[str, Tuple[str, ...]] = LRUCache(cache_size)
+        self.tokens: LRUCache[str, str] = LRUCache(cache_size)
+        self._messages_fallback = self._fallback()  # setting the cached messages were analyzed with
+
+    def _fallback(self) -> bool:
+        flag = self.wordnet_fallback
+        return bool(flag() if callable(flag) else flag)
+
+    def __call__(self, text: str) -> List[str]:
+        fallback = self._fallback()
+        if fallback != self._messages_fallback:
+            self.messages.clear()
+            self._messages_fallback = fallback
+        cached = self.messages.get(text)
+        if cached is None:
+            cached = tuple(self.lemma(tok) for tok in self.tokenizer(text))
+            self.messages.put(text, cached)
+        return list(cached)
+
+    def lemma(self, token: str) -> str:
+        low = token.lower()
+        if self.lemmas is not None:
+            lemma = self.lemmas.get(low)
+            if lemma is not None:
+                return lemma
+            if not self._fallback():
+                return low
+        lemma = self.tokens.get(low)
+        if lemma is None:
+            ensure_nltk("wordnet", "omw-1.4")
+            lemma = lemmatizer.lemmatize(low)
+            self.tokens.put(low, lemma)
+        return lemma
+
+    def cache_stats(self) -> Dict[str, CacheStats]:
+        return {"messages": self.messages.stats(), "tokens": self.tokens.stats()}
+
+
+class VocabIndex:
+    """Frozen lemma -> column mapping, compiled once per vocabulary.
+
+    Featurizing a sentence then only touches the matched columns, so the cost
+    grows with the message length rather than with the vocabulary size.
+    """
+
+    __slots__ = ("_index", "size")
+
+    def __init__(self, words: Sequence[str]):
+        self._index: Mapping[str, int] = MappingProxyType({w: i for i, w in enumerate(words)})
+        self.size = len(words)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, token: object) -> bool:
+        return token in self._index
+
+    def get(self, token: str) -> int | None:
+        return self._index.get(token)
+
+    def indices(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """Sorted, de-duplicated columns of the tokens present in the vocabulary."""
+        index = self._index
+        return tuple(sorted({index[t] for t in tokens if t in index}))
+
+
+class SortedVocabIndex:
+    """Array-backed alternative to `VocabIndex` (binary search, no dict).
+
+    `words` is a fixed-width unicode array in column order and `order` its
+    argsort, so both can live in shared memory or an mmap and be used without
+    building a per-process dictionary.
+    """
+
+    __slots__ = ("words", "order", "size")
+
+    def __init__(self, words: np.ndarray, order: np.ndarray | None = None):
+        self.words = words
+        self.order = np.argsort(words, kind="stable") if order is None else order
+        self.size = len(words)
+
+    @classmethod
+    def from_words(cls, words: Sequence[str]) -> "SortedVocabIndex":
+        return cls(np.array(list(words), dtype=str))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def get(self, token: str) -> int | None:
+        hits = self._lookup([token])
+        return int(hits[0]) if len(hits) else None
+
+    def __contains__(self, token: object) -> bool:
+        return isinstance(token, str) and self.get(token) is not None
+
+    def _lookup(self, tokens: List[str]) -> np.ndarray:
+        if not tokens or not self.size:
+            return np.zeros(0, dtype=np.int64)
+        # Natural width: casting to the vocab width would truncate long tokens
+        toks = np.asarray(tokens, dtype=str)
+        pos = np.searchsorted(self.words, toks, sorter=self.order)
+        cols = self.order[np.minimum(pos, self.size - 1)]
+        return cols[self.words[cols] == toks]
+
+    def indices(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(int(i) for i in np.unique(self._lookup(list(tokens))))
+
+
+class HashingIndex:
+    """Vocabulary-free featurizer: each lemma goes to column `crc32(lemma) % dim`.
+
+    The input width is fixed by `dim`, so nothing has to be stored or loaded
+    to featurize, and new patterns never change the network's shape. Distinct
+    lemmas may share a column; pick `dim` well above the vocabulary size.
+    IGNORE_TOKENS get no column, as they get none in a vocabulary.
+    """
+
+    __slots__ = ("size",)
+
+    def __init__(self, dim: int):
+        if dim < 1:
+            raise ValueError("dim must be >= 1")
+        self.size = int(dim)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, token: object) -> bool:
+        return isinstance(token, str) and token not in IGNORE_TOKENS
+
+    def get(self, token: str) -> int:
+        return zlib.crc32(token.encode("utf-8")) % self.size
+
+    def indices(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(sorted({self.get(t) for t in tokens if t not in IGNORE_TOKENS}))
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """Bundle metadata describing this featurizer (see `index_from_meta`)."""
+        return {"type": "hashing", "dim": self.size, "hash": "crc32"}
+
+
+Index = VocabIndex | SortedVocabIndex | HashingIndex
+
+
+def _as_index(words_vocab: Sequence[str] | Index) -> Index:
+    if isinstance(words_vocab, (VocabIndex, SortedVocabIndex, HashingIndex)):
+        return words_vocab
+    return VocabIndex(words_vocab)
+
+
+def index_from_meta(meta: Mapping[str, Any]) -> HashingIndex | None:
+    """Featurizer recorded in a bundle's metadata; None for vocabulary models."""
+    featurizer = meta.get("featurizer")
+    if not featurizer:
+        return None
+    if featurizer.get("type") != "hashing" or featurizer.get("hash", "crc32") != "crc32":
+        raise ValueError(f"Unsupported featurizer: {featurizer!r}")
+    return HashingIndex(int(featurizer["dim"]))
+
+
+def bag_of_words(sentence: str, words_vocab: Sequence[str] | Index, *,
+                 analyzer: Callable[[str], List[str]] | None = None) -> np.ndarray:
+    """Convert sentence into a BoW vector aligned to words_vocab ordering.
+
+    Pass a precompiled `VocabIndex` to avoid rebuilding it on every call.
+    `analyzer` turns text into lemmas (defaults to `tokenize_and_lemmatize`).
+    """
+    index = _as_index(words_vocab)
+    analyze = analyzer or tokenize_and_lemmatize
+    bag = np.zeros(len(index), dtype=np.float32)
+    bag[list(index.indices(analyze(sentence)))] = 1.0
     return bag
 
 
+def bag_of_words_batch(sentences: List[str], words_vocab: Sequence[str] | Index, *,
+                       analyzer: Callable[[str], List[str]] | None = None) -> np.ndarray:
+    """Stack BoW vectors for many sentences into one (N x vocab) matrix."""
+    index = _as_index(words_vocab)
+    analyze = analyzer or tokenize_and_lemmatize
+    return bags_from_indices([index.indices(analyze(s)) for s in sentences], len(index))
+
+
+def bags_from_indices(features: Sequence[Tuple[int, ...]], dim: int) -> np.ndarray:
+    """(N x dim) BoW matrix from the active column indices of each row."""
+    counts = np.fromiter(map(len, features), dtype=np.intp, count=len(features))
+    cols = np.fromiter(itertools.chain.from_iterable(features), dtype=np.intp, count=int(counts.sum()))
+    bags = np.zeros((len(features), dim), dtype=np.float32)
+    bags[np.repeat(np.arange(len(features)), counts), cols] = 1.0
+    return bags
+
+
 # ---------- Intents ----------
 
 
@@ -83,30 +376,392 @@ def save_intents(data: Dict[str, Any], path: str | Path) -> None:
     p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
+NO_RESPONSE = "I don't understand."
+
+
+class ResponseStore:
+    """Responses compiled per class index; patterns are not kept.
+
+    Built once when intents are loaded, so answering a tag is a dict lookup
+    plus a random pick instead of a scan over the whole intents list.
+    """
+
+    __slots__ = ("classes", "responses", "_tag_index")
+
+    def __init__(self, classes: Sequence[str], responses: Sequence[Sequence[str]]):
+        if len(classes) != len(responses):
+            raise ValueError("classes and responses must have the same length")
+        self.classes: Tuple[str, ...] = tuple(classes)
+        self.responses: Tuple[Tuple[str, ...], ...] = tuple(tuple(r) for r in responses)
+        self._tag_index = MappingProxyType({tag: i for i, tag in enumerate(self.classes)})
+
+    @classmethod
+    def from_intents(cls, intents_data: Dict[str, Any], classes: Sequence[str] | None = None) -> "ResponseStore":
+        """Compile ``intents_data`` in ``classes`` order (the model's output order).
+
+        Tags missing from ``classes`` are appended after them; classes without
+        an intent get an empty slot.
+        """
+        by_tag: Dict[str, List[str]] = {}
+        for it in intents_data.get("intents", []):
+            tag = it.get("tag")
+            if tag is not None:
+                by_tag.setdefault(tag, []).extend(it.get("responses", []))
+        order = list(classes or [])
+        known = set(order)
+        order += [t for t in by_tag if t not in known]
+        return cls(order, [by_tag.get(t, ()) for t in order])
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self._tag_index
+
+    def index(self, tag: str) -> int:
+        return self._tag_index.get(tag, -1)
+
+    def respond_index(self, i: int) -> str:
+        if 0 <= i < len(self.responses) and self.responses[i]:
+            return random.choice(self.responses[i])
+        return NO_RESPONSE
+
+    def respond(self, tag: str) -> str:
+        return self.respond_index(self.index(tag))
+
+
+# ---------- NumPy inference engine ----------
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+
+
+@dataclass
+class DenseLayer:
+    kernel: np.ndarray  # (inputs, units)
+    bias: np.ndarray  # (units,)
+    activation: str = "linear"
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        return _ACTIVATIONS[self.activation](x @ self.kernel + self.bias)
+
+
+@dataclass
+class QuantizedDenseLayer:
+    """Dense layer run directly from compressed weights.
+
+    `kernel` is int8 with one float32 `scale` per output unit, or float16 with
+    `scale=None`. Rows of the kernel are only widened for the non-zero inputs,
+    which for bag-of-words features is a handful of vocabulary rows.
+    """
+    kernel: np.ndarray  # (inputs, units) int8 or float16
+    bias: np.ndarray  # (units,) float32
+    activation: str = "linear"
+    scale: np.ndarray | None = None  # (units,) float32, int8 only
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        if np.count_nonzero(x) * 4 < x.size:
+            rows, cols = np.nonzero(x)
+            contrib = self.kernel[cols].astype(np.float32) * x[rows, cols][:, None]
+            out = np.zeros((x.shape[0], self.kernel.shape[1]), dtype=np.float32)
+            np.add.at(out, rows, contrib)
+        else:
+            out = x @ self.kernel.astype(np.float32)
+        if self.scale is not None:
+            out *= self.scale
+        return _ACTIVATIONS[self.activation](out + self.bias)
+
+
+QUANTIZATION_MODES = ("int8", "float16")
+
+
+def quantize_layer(layer: DenseLayer, mode: str) -> QuantizedDenseLayer:
+    """int8: symmetric per-output-channel scales; float16: plain cast."""
+    kernel = np.asarray(layer.kernel, dtype=np.float32)
+    bias = np.asarray(layer.bias, dtype=np.float32)
+    if mode == "float16":
+        return QuantizedDenseLayer(kernel.astype(np.float16), bias, layer.activation)
+    if mode == "int8":
+        scale = np.max(np.abs(kernel), axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        q = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+        return QuantizedDenseLayer(q, bias, layer.activation, scale.astype(np.float32))
+    raise ValueError(f"Unknown quantization mode: {mode!r} (expected one of {QUANTIZATION_MODES})")
+
+
+class NumpyDenseModel:
+    """Forward pass of the `chatbot_dense` network using plain NumPy.
+
+    Dropout is the identity at inference time, so only Dense layers are kept.
+    Exposes the same `predict(x, verbose=0)` call as a Keras model so it can be
+    dropped into `IntentModel` unchanged.
+    """
+
+    def __init__(self, layers: List[DenseLayer | QuantizedDenseLayer]):
+        if not layers:
+            raise ValueError("Model has no Dense layers")
+        for layer in layers:
+            if layer.activation not in _ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {layer.activation}")
+        self.layers = layers
+
+    @property
+    def nbytes(self) -> int:
+        total = 0
+        for layer in self.layers:
+            total += layer.kernel.nbytes + layer.bias.nbytes
+            scale = getattr(layer, "scale", None)
+            if scale is not None:
+                total += scale.nbytes
+        return total
+
+    @property
+    def input_dim(self) -> int:
+        return int(self.layers[0].kernel.shape[0])
+
+    @property
+    def output_dim(self) -> int:
+        return int(self.layers[-1].kernel.shape[1])
+
+    def predict(self, x: np.ndarray, verbose: int = 0) -> np.ndarray:
+        out = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            out = layer.forward(out)
+        return out
+
+    @classmethod
+    def from_keras(cls, model: Any) -> "NumpyDenseModel":
+        """Copy the Dense weights out of an in-memory Keras model."""
+        layers: List[DenseLayer] = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == "Dense":
+                kernel, bias = (np.asarray(w, dtype=np.float32) for w in layer.get_weights())
+                layers.append(DenseLayer(kernel, bias, layer.get_config().get("activation", "linear")))
+            elif kind not in ("Dropout", "InputLayer"):
+                raise ValueError(f"Unsupported layer for NumPy backend: {kind}")
+        return cls(layers)
+
+    @classmethod
+    def from_keras_file(cls, path: str | Path) -> "NumpyDenseModel":
+        """Read Dense weights from a saved .keras/.h5 file without importing Keras."""
+        try:
+            import h5py  # import lazily
+        except Exception as e:  # pragma: no cover - environment dependent
+            raise RuntimeError("h5py not available to read model weights") from e
+
+        p = Path(path)
+        if p.suffix == ".h5":
+            with h5py.File(p, "r") as f:
+                config = json.loads(f.attrs["model_config"])
+                return cls(_dense_layers_from_h5(config, f["model_weights"], legacy=True))
+
+        with zipfile.ZipFile(p) as z:
+            config = json.loads(z.read("config.json"))
+            with z.open("model.weights.h5") as wf:
+                with h5py.File(io.BytesIO(wf.read()), "r") as f:
+                    return cls(_dense_layers_from_h5(config, f["layers"], legacy=False))
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _dense_layers_from_h5(config: Dict[str, Any], group: Any, *, legacy: bool) -> List[DenseLayer]:
+    """Map the Sequential config onto its weight groups.
+
+    Keras 3 (.keras) stores weights under auto-generated class names
+    (`dense`, `dense_1`, ...) in layer order; legacy H5 uses the layer names.
+    """
+    layers: List[DenseLayer] = []
+    seen: Dict[str, int] = {}
+    for spec in config.get("config", {}).get("layers", []):
+        kind = spec.get("class_name")
+        cfg = spec.get("config", {})
+        if kind == "InputLayer":
+            continue
+        if legacy:
+            key = cfg.get("name")
+        else:
+            base = _snake_case(kind)
+            n = seen.get(base, 0)
+            seen[base] = n + 1
+            key = base if n == 0 else f"{base}_{n}"
+        if kind == "Dropout":
+            continue
+        if kind != "Dense":
+            raise ValueError(f"Unsupported layer for NumPy backend: {kind}")
+        if legacy:
+            arrays: Dict[str, np.ndarray] = {}
+
+            def _collect(name: str, obj: Any) -> None:
+                # e.g. "inp_layer/kernel:0" -> "kernel"
+                if hasattr(obj, "shape"):
+                    arrays.setdefault(name.rsplit("/", 1)[-1].split(":")[0], obj[()])
+
+            group[key].visititems(_collect)
+            kernel, bias = arrays["kernel"], arrays["bias"]
+        else:
+            kernel, bias = group[key]["vars"]["0"][()], group[key]["vars"]["1"][()]
+        layers.append(DenseLayer(np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32),
+                                 cfg.get("activation", "linear")))
+    return layers
+
+
 # ---------- Artifacts + Inference ----------
 
 
+BACKENDS = ("keras", "numpy")
+
+
 @dataclass
 class IntentArtifacts:
-    model_path: Path
-    words_path: Path
-    classes_path: Path
+    model_path: Path  # .bundle for trained models; legacy .keras/.h5 otherwise
+    words_path: Path | None = None  # legacy pickle sidecars
+    classes_path: Path | None = None
     intents_path: Path | None = None
+    keras_path: Path | None = None  # native Keras model next to the bundle
+    cached: bool = False  # True when train_and_save reused an identical earlier model
+    warm_started: bool = False  # True when fine-tuned from a previous model's weights
+
+
+# train_and_save stages, in order, with their share of the overall progress
+TRAINING_STAGES: Dict[str, Tuple[float, float]] = {"prepare": (0.0, 0.1), "train": (0.1, 0.95), "save": (0.95, 1.0)}
+
+
+@dataclass(frozen=True)
+class TrainingProgress:
+    """Snapshot passed to `train_and_save(progress=...)` at each stage and epoch."""
+    stage: str  # one of TRAINING_STAGES
+    epoch: int = 0  # epochs completed
+    epochs: int = 0  # epoch budget (early stopping may end sooner)
+    loss: float | None = None
+    accuracy: float | None = None
+    elapsed: float = 0.0  # seconds since train_and_save started
+    eta: float | None = None  # seconds left in the "train" stage (an upper bound)
+
+    @property
+    def fraction(self) -> float:
+        """Overall completion in [0, 1] for progress bars."""
+        start, end = TRAINING_STAGES.get(self.stage, (1.0, 1.0))
+        if self.stage == "train" and self.epochs:
+            return start + (end - start) * min(self.epoch / self.epochs, 1.0)
+        return start
+
+
+class TrainingCancelled(Exception):
+    """Raised from a progress callback to abort `train_and_save`."""
 
 
 @dataclass
 class IntentModel:
-    model: Any  # Keras Model, typed as Any to avoid importing heavy symbols at module import
-    words: List[str]
+    model: Any  # Keras Model or NumpyDenseModel, typed as Any to avoid importing heavy symbols at module import
+    words: Sequence[str]  # list, or a unicode array mapped from a bundle
     classes: List[str]
+    index: Index | None = field(default=None, repr=False, compare=False)
+    # Surface -> lemma table shipped with the model; None means WordNet
+    lemmas: Mapping[str, str] | None = field(default=None, repr=False, compare=False)
+    wordnet_fallback: bool = False  # consult WordNet for tokens missing from `lemmas`
+    tokenizer: str = DEFAULT_TOKENIZER  # must match the one used for training
+    analyzer: TextAnalyzer | None = field(default=None, repr=False, compare=False)
+    # Class probabilities keyed on the active feature indices (0 disables)
+    prediction_cache_size: int = 1024
+    predictions: LRUCache | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Compiled once per loaded model, reused by every prediction
+        if self.index is None:
+            self.index = VocabIndex(self.words)
+        if self.analyzer is None:
+            # Reads the flag through the model, so setting it later takes effect
+            self.analyzer = TextAnalyzer(self.tokenizer, self.lemmas,
+                                         wordnet_fallback=functools.partial(getattr, self, "wordnet_fallback"))
+        if self.predictions is None:
+            self.predictions = LRUCache(self.prediction_cache_size)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size: weights plus vocabulary and lemma table."""
+        weights = getattr(self.model, "nbytes", None)
+        if weights is None:
+            count_params = getattr(self.model, "count_params", None)  # Keras
+            weights = 4 * int(count_params()) if callable(count_params) else 0
+        if isinstance(self.words, np.ndarray):
+            words = self.words.nbytes
+        else:
+            words = sum(sys.getsizeof(w) for w in self.words)
+        lemmas = 0
+        if self.lemmas is not None:
+            lemmas = sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.lemmas.items())
+        return int(weights) + words + lemmas
+
+    def analyze(self, sentence: str) -> List[str]:
+        return self.analyzer(sentence)
+
+    def features(self, sentence: str) -> Tuple[int, ...]:
+        """Sorted active vocabulary columns: the model only ever sees these."""
+        return self.index.indices(self.analyze(sentence))
 
     def predict_tag(self, sentence: str) -> str:
-        bow = bag_of_words(sentence, self.words)
-        # Predict on a batch of size 1
-        res = self.model.predict(np.array([bow]), verbose=0)[0]
+        res = self.predict_proba([sentence])[0]
         max_index = int(np.argmax(res))
         return self.classes[max_index]
 
+    def predict_proba(self, sentences: List[str]) -> np.ndarray:
+        """Class probabilities for many sentences with a single predict call.
+
+        Sentences with the same feature set ("hola!", "Hola", "hola ??") share
+        one cached row; only unseen feature sets reach the network.
+        """
+        if not sentences:
+            return np.zeros((0, len(self.classes)), dtype=np.float32)
+        keys = [self.features(s) for s in sentences]
+        rows: Dict[Tuple[int, ...], np.ndarray | None] = {}
+        missing: List[Tuple[int, ...]] = []
+        for key in keys:
+            if key in rows:
+                continue
+            cached = self.predictions.get(key)
+            if cached is None:
+                missing.append(key)
+                rows[key] = None  # placeholder, filled below
+            else:
+                rows[key] = cached
+        if missing:
+            probs = np.asarray(self.model.predict(bags_from_indices(missing, len(self.index)), verbose=0),
+                               dtype=np.float32)
+            for key, row in zip(missing, probs):
+                row = row.copy()
+                row.flags.writeable = False
+                rows[key] = row
+                self.predictions.put(key, row)
+        return np.stack([rows[key] for key in keys])
+
+    def cache_stats(self) -> Dict[str, CacheStats]:
+        return {"predictions": self.predictions.stats(), **self.analyzer.cache_stats()}
+
+    def clear_cache(self) -> None:
+        self.predictions.clear()
+        self.analyzer.messages.clear()
+        self.analyzer.tokens.clear()
+
+    def predict_tags(self, sentences: List[str]) -> List[Tuple[str, float]]:
+        """Return (tag, probability) for each sentence, in input order."""
+        probs = self.predict_proba(sentences)
+        best = np.argmax(probs, axis=1) if len(probs) else []
+        return [(self.classes[int(i)], float(probs[row, i])) for row, i in enumerate(best)]
+
 
 def _derive_sidecars(model_path: Path) -> Tuple[Path, Path]:
     base = model_path.with_suffix("")
@@ -115,20 +770,108 @@ def _derive_sidecars(model_path: Path) -> Tuple[Path, Path]:
     return words_path, classes_path
 
 
+def save_bundle(path: str | Path, engine: NumpyDenseModel, words: Sequence[str], classes: Sequence[str], *,
+                lemmas: Mapping[str, str] | None = None, meta: Dict[str, Any] | None = None) -> Path:
+    """Write weights, vocabulary, classes and lemma table as one mmap-able file."""
+    words_arr = string_array(list(words))
+    surfaces = sorted(lemmas or {})
+    arrays: Dict[str, np.ndarray] = {
+        "words": words_arr,
+        "words_order": np.argsort(words_arr, kind="stable"),
+        "classes": string_array(list(classes)),
+        "lemma_surface": string_array(surfaces),
+        "lemma_target": string_array([lemmas[w] for w in surfaces] if lemmas else []),
+    }
+    for i, layer in enumerate(engine.layers):
+        quantized = isinstance(layer, QuantizedDenseLayer)
+        arrays[f"kernel_{i}"] = layer.kernel if quantized else np.asarray(layer.kernel, dtype=np.float32)
+        arrays[f"bias_{i}"] = np.asarray(layer.bias, dtype=np.float32)
+        if quantized and layer.scale is not None:
+            arrays[f"scale_{i}"] = layer.scale
+    meta = {**(meta or {}), "architecture": "chatbot_dense",
+            "activations": [layer.activation for layer in engine.layers]}
+    return write_bundle(path, arrays, meta)
+
+
+def layers_from_arrays(arrays: Mapping[str, np.ndarray], activations: Sequence[str]) -> List[DenseLayer | QuantizedDenseLayer]:
+    """Rebuild engine layers from `kernel_i`/`bias_i`/`scale_i` arrays (bundle or shared memory)."""
+    layers: List[DenseLayer | QuantizedDenseLayer] = []
+    for i, act in enumerate(activations):
+        kernel, bias = arrays[f"kernel_{i}"], arrays[f"bias_{i}"]
+        scale = arrays.get(f"scale_{i}")
+        if scale is not None or kernel.dtype != np.float32:
+            layers.append(QuantizedDenseLayer(kernel, bias, act, scale))
+        else:
+            layers.append(DenseLayer(kernel, bias, act))
+    return layers
+
+
+def lemma_table_from_arrays(surface: np.ndarray, target: np.ndarray) -> Mapping[str, str]:
+    return MappingProxyType(dict(zip(surface.tolist(), target.tolist())))
+
+
+def load_bundle(path: str | Path, *, backend: str | None = None,
+                wordnet_fallback: bool = False) -> IntentModel:
+    """Load a `.bundle` model. The default "numpy" backend is zero-copy (mmap).
+
+    Inference lemmatizes with the bundled lemma table, so WordNet is never
+    loaded unless `wordnet_fallback` is set.
+    """
+    backend = backend or "numpy"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r} (expected one of {BACKENDS})")
+    bundle = read_bundle(path)
+    words = bundle["words"]
+    classes = [str(c) for c in bundle["classes"]]
+    index = index_from_meta(bundle.meta) or SortedVocabIndex(words, bundle["words_order"])
+
+    if backend == "keras":
+        keras_name = bundle.meta.get("keras_model")
+        if not keras_name:
+            raise FileNotFoundError("Bundle has no Keras model; use the numpy backend")
+        try:
+            from keras.models import load_model  # import lazily
+        except Exception as e:  # pragma: no cover - environment dependent
+            raise RuntimeError("Keras backend not available to load model") from e
+        model = load_model(str(bundle.path.with_name(keras_name)))
+    else:
+        model = NumpyDenseModel(layers_from_arrays(bundle.arrays, bundle.meta["activations"]))
+    lemmas = lemma_table_from_arrays(bundle["lemma_surface"], bundle["lemma_target"])
+    return IntentModel(model=model, words=words, classes=classes, index=index, lemmas=lemmas,
+                       wordnet_fallback=wordnet_fallback, tokenizer=bundle.meta.get("tokenizer", DEFAULT_TOKENIZER))
+
+
 def load_artifacts(model_path: str | Path, *, words_path: str | Path | None = None,
-                   classes_path: str | Path | None = None) -> IntentModel:
-    """Load Keras model + vocabulary + classes.
+                   classes_path: str | Path | None = None, backend: str | None = None,
+                   wordnet_fallback: bool = False) -> IntentModel:
+    """Load model + vocabulary + classes.
+
+    `.bundle` files carry everything in one mmap-able file (see `load_bundle`).
 
-    If words/classes paths are not provided, we try alongside the model with
-    the convention: <modelbase>_words.pkl and <modelbase>_classes.pkl, else
-    fall back to `storage/words.pkl` and `storage/classes.pkl`.
+    For legacy `.keras`/`.h5` models, if words/classes paths are not provided,
+    we try alongside the model with the convention: <modelbase>_words.pkl and
+    <modelbase>_classes.pkl, else fall back to `storage/words.pkl` and
+    `storage/classes.pkl`.
+
+    `backend` selects the inference engine: "keras" (default for legacy files)
+    deserializes the Keras model, "numpy" (default for bundles) runs the Dense
+    weights with NumPy and never imports Keras/TensorFlow.
+
+    Bundles also carry a lemma table; `wordnet_fallback` lets tokens missing
+    from it go through WordNet. Legacy models always lemmatize with WordNet.
     """
-    ensure_nltk()
     model_p = Path(model_path)
-    try:
-        from keras.models import load_model  # import lazily
-    except Exception as e:  # pragma: no cover - environment dependent
-        raise RuntimeError("Keras backend not available to load model") from e
+    if model_p.suffix == BUNDLE_SUFFIX:
+        return load_bundle(model_p, backend=backend, wordnet_fallback=wordnet_fallback)
+    backend = backend or "keras"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r} (expected one of {BACKENDS})")
+    ensure_nltk()
+    if backend == "keras":
+        try:
+            from keras.models import load_model  # import lazily
+        except Exception as e:  # pragma: no cover - environment dependent
+            raise RuntimeError("Keras backend not available to load model") from e
 
     # Resolve sidecar paths
     w_p, c_p = _derive_sidecars(model_p)
@@ -143,10 +886,104 @@ def load_artifacts(model_path: str | Path, *, words_path: str | Path | None = No
     with classes_p.open("rb") as f:
         classes = pickle.load(f)
 
-    model = load_model(str(model_p))
+    if backend == "numpy":
+        model = NumpyDenseModel.from_keras_file(model_p)
+    else:
+        model = load_model(str(model_p))
     return IntentModel(model=model, words=words, classes=classes)
 
 
+@dataclass
+class QuantizationReport:
+    mode: str
+    path: Path
+    bytes_before: int  # weight bytes
+    bytes_after: int
+    accuracy_before: float | None = None  # top-1 accuracy on the training intents
+    accuracy_after: float | None = None
+    agreement: float | None = None  # share of identical top-1 predictions
+
+    @property
+    def accuracy_delta(self) -> float | None:
+        if self.accuracy_before is None or self.accuracy_after is None:
+            return None
+        return self.accuracy_after - self.accuracy_before
+
+    def summary(self) -> str:
+        size = f"{self.bytes_before / 1024:.1f} KiB -> {self.bytes_after / 1024:.1f} KiB"
+        if self.accuracy_delta is None:
+            return f"[{self.mode}] {size}"
+        return (f"[{self.mode}] {size}, accuracy {self.accuracy_before:.3f} -> {self.accuracy_after:.3f} "
+                f"({self.accuracy_delta:+.3f}), agreement {self.agreement:.3f}")
+
+
+def quantize_bundle(bundle_path: str | Path, intents: Dict[str, Any] | None = None, *,
+                    mode: str = "int8", out_path: str | Path | None = None) -> QuantizationReport:
+    """Export a quantized copy of a trained bundle.
+
+    Writes `<base>.<mode>.bundle` by default. When `intents` are given, the
+    report compares top-1 accuracy of both models on the training patterns.
+    The copy is registered in its directory's registry as a model of its
+    own (so it becomes the latest and is garbage-collected like any other).
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {mode!r} (expected one of {QUANTIZATION_MODES})")
+    src = Path(bundle_path)
+    bundle = read_bundle(src)
+    original = load_bundle(src, backend="numpy")
+    engine = NumpyDenseModel([
+        layer if isinstance(layer, QuantizedDenseLayer) else quantize_layer(layer, mode)
+        for layer in original.model.layers
+    ])
+    out = Path(out_path) if out_path else src.with_name(f"{src.stem}.{mode}{BUNDLE_SUFFIX}")
+    registry = ModelRegistry.open(out.parent)  # before writing: a seeding scan must not see the copy
+    source_entry = registry.get(src) if out.parent.resolve() == src.parent.resolve() else None
+    lemmas = dict(zip((str(w) for w in bundle["lemma_surface"]), (str(w) for w in bundle["lemma_target"])))
+    meta = {k: v for k, v in bundle.meta.items() if k not in ("keras_model", "activations")}
+    save_bundle(out, engine, original.words, original.classes, lemmas=lemmas,
+                meta={**meta, "quantization": mode, "source": src.name})
+
+    report = QuantizationReport(mode=mode, path=out, bytes_before=original.model.nbytes, bytes_after=engine.nbytes)
+    if intents:
+        _words, _classes, documents = build_training_data(intents, original.tokenizer)
+        documents = [d for d in documents if d[1] in original.classes]
+        if documents:
+            x, y = vectorize_training(original.index, original.classes, documents)
+            truth = np.argmax(y, axis=1)
+            before = np.argmax(original.model.predict(x), axis=1)
+            after = np.argmax(engine.predict(x), axis=1)
+            report.accuracy_before = float(np.mean(before == truth))
+            report.accuracy_after = float(np.mean(after == truth))
+            report.agreement = float(np.mean(before == after))
+    accuracy = report.accuracy_after
+    if accuracy is None and source_entry is not None:
+        accuracy = source_entry.accuracy
+    registry.register(
+        out,
+        intents_hash=source_entry.intents_hash if source_entry else None,
+        vocab_size=len(original.index),
+        num_classes=len(original.classes),
+        accuracy=accuracy,
+        meta={"quantization": mode, "source": src.name},
+    )
+    print(f"[chatbot] Cuantización {report.summary()}")
+    return report
+
+
+def find_latest_model(directory: str | Path, label: str | None = None) -> Path | None:
+    """Latest registered model in `directory` (optionally the latest with `label`).
+
+    Reads the registry manifest instead of globbing; a directory without one
+    is scanned once to seed it, preferring bundles over legacy files.
+    """
+    d = Path(directory)
+    if not d.exists():
+        return None
+    registry = ModelRegistry.open(d)
+    entry = registry.by_label(label) if label is not None else registry.latest()
+    return registry.resolve(entry) if entry is not None else None
+
+
 def respond_from_intents(tag: str, intents_data: Dict[str, Any]) -> str:
     intents = intents_data.get("intents", [])
     for it in intents:
@@ -154,109 +991,939 @@ def respond_from_intents(tag: str, intents_data: Dict[str, Any]) -> str:
             responses = it.get("responses", [])
             if responses:
                 return random.choice(responses)
-    return "I don't understand."
+    return NO_RESPONSE
 
 
 # ---------- Training ----------
 
 
-def build_training_data(intents: Dict[str, Any]) -> Tuple[List[str], List[str], List[Tuple[List[str], str]]]:
+PATTERN_CACHE_NAME = "pattern_cache.jsonl"
+
+
+class PatternCache:
+    """Persistent pattern -> (tokens, lemmas) cache for training.
+
+    Entries are keyed by a hash of the tokenizer name and the pattern text,
+    so editing one intent only re-tokenizes and re-lemmatizes the patterns
+    that actually changed. New entries are appended to a JSON-lines file;
+    `save` rewrites it without unused entries once those dominate.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else None
+        self._entries: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        self._pending: List[str] = []  # computed since the last save
+        self._used: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path: str | Path) -> "PatternCache":
+        cache = cls(path)
+        if cache.path.exists():
+            with cache.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        cache._entries[record["k"]] = (tuple(record["t"]), tuple(record["l"]))
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn or foreign line
+        return cache
+
+    @staticmethod
+    def key(pattern: str, tokenizer: str) -> str:
+        return hashlib.sha256(f"{tokenizer}\0{pattern}".encode("utf-8")).hexdigest()[:32]
+
+    def get(self, pattern: str, tokenizer: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]] | None:
+        key = self.key(pattern, tokenizer)
+        self._used.add(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, pattern: str, tokenizer: str, entry: Tuple[Tuple[str, ...], Tuple[str, ...]]) -> None:
+        key = self.key(pattern, tokenizer)
+        self._used.add(key)
+        if key not in self._entries:
+            self._pending.append(key)
+        self._entries[key] = entry
+
+    def lookup(self, pattern: str, tokenizer: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """(tokens, lemmas of the lower-cased tokens) for `pattern`."""
+        entry = self.get(pattern, tokenizer)
+        if entry is None:
+            entry = _analyze_patterns([pattern], tokenizer)[0]
+            self.put(pattern, tokenizer, entry)
+        return entry
+
+    def lemmas(self) -> Dict[str, str]:
+        """Token -> lemma for every cached token (seeds vectorize_training)."""
+        return {t: l for tokens, lemmas in self._entries.values() for t, l in zip(tokens, lemmas)}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        unused = len(self._entries) - len(self._used)
+        if unused > len(self._used):
+            # Mostly stale (old edits): rewrite with the live entries only
+            self._entries = {k: v for k, v in self._entries.items() if k in self._used}
+            self._write(self._entries, mode="w")
+        elif self._pending:
+            self._write({k: self._entries[k] for k in self._pending if k in self._entries}, mode="a")
+        self._pending = []
+
+    def _write(self, entries: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]], mode: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [json.dumps({"k": k, "t": list(tokens), "l": list(lemmas)}, ensure_ascii=False) + "\n"
+                 for k, (tokens, lemmas) in entries.items()]
+        if mode == "a":
+            append_lines(self.path, lines)
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, self.path)
+
+
+def _analyze_chunk(patterns: Sequence[str], tokenizer: str | Callable[[str], List[str]] | None,
+                   memo: Dict[str, str] | None = None) -> List[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """(tokens, lemmas) per pattern; the unit of work of the serial and parallel paths.
+
+    `memo` (token -> lemma) can be shared across the chunks of one run.
+    """
+    tokenize_fn = get_tokenizer(tokenizer)
+    memo = {} if memo is None else memo
+    out = []
+    for pattern in patterns:
+        tokens = tuple(tokenize_fn(pattern))
+        lemmas = []
+        for t in tokens:
+            lemma = memo.get(t)
+            if lemma is None:
+                lemma = memo[t] = lemmatizer.lemmatize(t.lower())
+            lemmas.append(lemma)
+        out.append((tokens, tuple(lemmas)))
+    return out
+
+
+def _init_pattern_worker(ensure: Callable[[], None], lemma: Any) -> None:
+    # Same lemmatizer and NLTK setup as the parent; once per worker, not per chunk
+    global lemmatizer
+    lemmatizer = lemma
+    ensure()
+
+
+def _analyze_patterns(patterns: List[str], tokenizer: str | Callable[[str], List[str]] | None, *,
+                      processes: int | None = None, chunk_size: int = 2048,
+                      on_chunk: Callable[[], None] | None = None
+                      ) -> List[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """Analyze `patterns` in order, sharded across processes when asked to.
+
+    Only named tokenizers can be shipped to workers; callables (and small
+    inputs that fit in one chunk) run serially in this process.
+    `on_chunk` runs after every chunk; an exception from it (e.g.
+    `TrainingCancelled`) cancels the chunks not started yet.
+    """
+    chunks = [patterns[i:i + chunk_size] for i in range(0, len(patterns), chunk_size)]
+    ensure_nltk()  # any download happens here, once; pool workers then only check
+    if not processes or processes < 2 or callable(tokenizer) or len(chunks) <= 1:
+        memo: Dict[str, str] = {}
+        out = []
+        for chunk in chunks:
+            out += _analyze_chunk(chunk, tokenizer, memo)
+            if on_chunk is not None:
+                on_chunk()
+        return out
+
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(chunks)),
+        mp_context=mp.get_context("spawn"),  # no forked TF/Flet state in workers
+        initializer=_init_pattern_worker,
+        initargs=(ensure_nltk, lemmatizer),
+    ) as pool:
+        # map() yields in submission order: the merge keeps pattern order
+        results = pool.map(_analyze_chunk, chunks, itertools.repeat(tokenizer))
+        out = []
+        try:
+            for chunk in results:
+                out += chunk
+                if on_chunk is not None:
+                    on_chunk()
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        return out
+
+
+def build_training_data(intents: Dict[str, Any], tokenizer: str | Callable[[str], List[str]] | None = None,
+                        *, cache: PatternCache | None = None, processes: int | None = None,
+                        chunk_size: int = 2048, on_chunk: Callable[[], None] | None = None
+                        ) -> Tuple[List[str], List[str], List[Tuple[List[str], str]]]:
     """Return (words_vocab, classes, documents) where documents is a list
-    of (token_list, tag)."""
-    ensure_nltk()
-    words: List[str] = []
+    of (token_list, tag).
+
+    With a `cache` (and a named tokenizer) unchanged patterns are not
+    tokenized or lemmatized again. `processes` > 1 shards the remaining
+    patterns across worker processes in `chunk_size` chunks; the result is
+    identical to the serial path. `on_chunk` runs after each analyzed chunk.
+    """
+    if cache is not None and callable(tokenizer):
+        cache = None  # only named tokenizers have a stable cache key
+    name = tokenizer or DEFAULT_TOKENIZER
     classes: List[str] = []
-    documents: List[Tuple[List[str], str]] = []
-    ignore = {"?", "!", "¿", ".", ","}
+    patterns: List[str] = []
+    tags: List[str] = []
 
     for intent in intents.get("intents", []):
         tag = intent.get("tag")
         for pattern in intent.get("patterns", []):
-            tok = nltk.word_tokenize(pattern)
-            words.extend(tok)
-            documents.append((tok, tag))
+            patterns.append(pattern)
+            tags.append(tag)
         if tag and tag not in classes:
             classes.append(tag)
 
-    words = [lemmatizer.lemmatize(w.lower()) for w in words if w not in ignore]
-    words = sorted(set(words))
-    return words, classes, documents
+    analyzed = [cache.get(p, name) if cache is not None else None for p in patterns]
+    todo = [i for i, entry in enumerate(analyzed) if entry is None]
+    if todo:
+        fresh = _analyze_patterns([patterns[i] for i in todo], tokenizer, processes=processes, chunk_size=chunk_size,
+                                  on_chunk=on_chunk)
+        for i, entry in zip(todo, fresh):
+            analyzed[i] = entry
+            if cache is not None:
+                cache.put(patterns[i], name, entry)
 
+    words = {lemma for tokens, lemmas in analyzed for t, lemma in zip(tokens, lemmas) if t not in IGNORE_TOKENS}
+    documents = [(list(tokens), tag) for (tokens, _lemmas), tag in zip(analyzed, tags)]
+    return sorted(words), classes, documents
 
-def vectorize_training(words: List[str], classes: List[str], documents: List[Tuple[List[str], str]]) -> Tuple[np.ndarray, np.ndarray]:
-    output_empty = [0] * len(classes)
-    training: List[Tuple[List[int], List[int]]] = []
 
-    for tokens, tag in documents:
-        token_lemmas = [lemmatizer.lemmatize(w.lower()) for w in tokens]
-        bag = [1 if w in token_lemmas else 0 for w in words]
-        row = list(output_empty)
-        row[classes.index(tag)] = 1
-        training.append((bag, row))
+def featurize_documents(words: List[str] | Index, classes: List[str], documents: List[Tuple[List[str], str]],
+                        *, lemmas: Mapping[str, str] | None = None) -> Tuple[List[Tuple[int, ...]], np.ndarray]:
+    """Sparse training set: active vocabulary columns and class index per document.
 
-    random.shuffle(training)
-    train_x = np.array([t[0] for t in training], dtype=np.float32)
-    train_y = np.array([t[1] for t in training], dtype=np.float32)
-    return train_x, train_y
+    Each distinct token is lemmatized once (or taken from `lemmas`, e.g.
+    `PatternCache.lemmas()`) and looked up in a VocabIndex, so the cost is
+    linear in the number of tokens and memory in the number of hits.
+    `words` may also be a prebuilt index such as `HashingIndex`.
+    """
+    index = _as_index(words)
+    class_index = {tag: i for i, tag in enumerate(classes)}
+    lemma_of: Dict[str, str] = dict(lemmas or {})
+    features: List[Tuple[int, ...]] = []
+    labels = np.empty(len(documents), dtype=np.intp)
 
+    for row, (tokens, tag) in enumerate(documents):
+        doc_lemmas = []
+        for w in tokens:
+            lemma = lemma_of.get(w)
+            if lemma is None:
+                lemma = lemma_of[w] = lemmatizer.lemmatize(w.lower())
+            doc_lemmas.append(lemma)
+        features.append(index.indices(doc_lemmas))
+        try:
+            labels[row] = class_index[tag]
+        except KeyError:
+            raise ValueError(f"{tag!r} is not in classes") from None
+    return features, labels
 
-def train_and_save(intents: Dict[str, Any], out_dir: str | Path, *,
-                   epochs: int = 100, batch_size: int = 5) -> IntentArtifacts:
-    """Train a small dense NN and save artifacts next to the model file.
-    
-    Returns paths to model (.keras), words.pkl and classes.pkl.
+
+def one_hot(labels: np.ndarray, num_classes: int) -> np.ndarray:
+    out = np.zeros((len(labels), num_classes), dtype=np.float32)
+    out[np.arange(len(labels)), labels] = 1.0
+    return out
+
+
+def vectorize_training(words: List[str] | Index, classes: List[str], documents: List[Tuple[List[str], str]],
+                       *, lemmas: Mapping[str, str] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Shuffled dense (BoW, one-hot) training matrices (see `featurize_documents`)."""
+    index = _as_index(words)
+    features, labels = featurize_documents(index, classes, documents, lemmas=lemmas)
+    order = list(range(len(documents)))
+    random.shuffle(order)
+    train_x = bags_from_indices([features[i] for i in order], len(index))
+    return train_x, one_hot(labels[order], len(classes))
+
+
+def stream_batches(features: Sequence[Tuple[int, ...]], labels: np.ndarray, dim: int, num_classes: int,
+                   batch_size: int, rng: np.random.Generator) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """One shuffled epoch of dense (x, y) batches built on the fly from sparse rows.
+
+    Only one batch is ever densified, so memory is bounded by
+    `batch_size x dim` instead of the whole corpus.
+    """
+    order = rng.permutation(len(features))
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        yield bags_from_indices([features[i] for i in rows], dim), one_hot(labels[rows], num_classes)
+
+
+def prefetch(items: Iterable[T], depth: int = 2) -> Iterator[T]:
+    """Produce `items` on a background thread, up to `depth` ahead of the consumer.
+
+    Lets the next batches be featurized while the current one trains (NumPy
+    and TensorFlow release the GIL in their kernels). Producer errors are
+    re-raised in the consumer; closing the iterator stops the producer.
+    """
+    buffer: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    done = object()
+    errors: List[BaseException] = []
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:  # surfaced on the consumer side
+            errors.append(e)
+        put(done)
+
+    threading.Thread(target=produce, name="batch-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                if errors:
+                    raise errors[0]
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _inflections(word: str) -> set:
+    """Common English plural forms of a lemma (the lemmatizer works on nouns)."""
+    forms = {word + "s", word + "es"}
+    if len(word) > 2 and word.endswith("y"):
+        forms.add(word[:-1] + "ies")
+    if word.endswith("fe"):
+        forms.add(word[:-2] + "ves")
+    elif word.endswith("f"):
+        forms.add(word[:-1] + "ves")
+    return forms
+
+
+def build_lemma_table(documents: List[Tuple[List[str], str]], words: Iterable[str] | None = None) -> Dict[str, str]:
+    """Surface form -> lemma for inference without WordNet.
+
+    Covers every token seen in the training documents plus common inflections
+    of the vocabulary lemmas that WordNet maps back onto the vocabulary.
     """
     ensure_nltk()
-    print("[chatbot] Inicio de entrenamiento")
+    surfaces = {tok.lower() for tokens, _tag in documents for tok in tokens}
+    table = {w: lemmatizer.lemmatize(w) for w in surfaces}
+    vocab = set(words) if words is not None else set(table.values())
+    for lemma in vocab:
+        for form in _inflections(lemma) - table.keys():
+            target = lemmatizer.lemmatize(form)
+            if target != form and target in vocab:
+                table[form] = target
+    return dict(sorted(table.items()))
+
+
+# Epochs without improvement before training stops; dropout makes per-epoch
+# loss noisy, so shorter waits stop too soon
+EARLY_STOPPING_PATIENCE = 10
+
+
+class EarlyStopping:
+    """Stop once neither training loss nor accuracy improved for `patience` epochs.
+
+    Called with each epoch's loss and accuracy; returns True when training
+    should stop. Either must beat its best by more than `min_delta` to count
+    as an improvement. `epochs_run` counts the epochs seen.
+    """
+
+    def __init__(self, patience: int = EARLY_STOPPING_PATIENCE, min_delta: float = 1e-3):
+        if patience < 1:
+            raise ValueError("patience must be >= 1")
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best_loss = float("inf")
+        self.best_accuracy = -1.0
+        self.wait = 0
+        self.epochs_run = 0
+
+    def __call__(self, loss: float, accuracy: float) -> bool:
+        self.epochs_run += 1
+        improved = False
+        if loss < self.best_loss - self.min_delta:
+            self.best_loss = loss
+            improved = True
+        if accuracy > self.best_accuracy + self.min_delta:
+            self.best_accuracy = accuracy
+            improved = True
+        self.wait = 0 if improved else self.wait + 1
+        return self.wait >= self.patience
+
+
+def _glorot_uniform(rng: np.random.Generator, fan_in: int, fan_out: int) -> np.ndarray:
+    limit = np.sqrt(6.0 / (fan_in + fan_out))
+    return rng.uniform(-limit, limit, size=(fan_in, fan_out)).astype(np.float32)
+
+
+def train_numpy(train_x: np.ndarray, train_y: np.ndarray, *, epochs: int = 100, batch_size: int = 5,
+                architecture: Dict[str, Any] | None = None, seed: int | None = None,
+                init: Sequence[DenseLayer] | None = None, early_stopping: EarlyStopping | None = None,
+                on_epoch: Callable[[int, float, float], Any] | None = None
+                ) -> Tuple[NumpyDenseModel, Dict[str, List[float]]]:
+    """Train the `chatbot_dense` MLP with NumPy mini-batch SGD on dense matrices.
+
+    Same network as the Keras path (ReLU hidden layers with dropout, softmax
+    output, categorical cross-entropy, Nesterov momentum), so the result is
+    saved and served exactly like a Keras-trained model. Returns the model
+    and a Keras-style history dict ("loss", "accuracy" per epoch).
+    `init` starts from existing layers (see `warm_start_layers`) instead of
+    a random initialization; `early_stopping` may end training before `epochs`.
+    `on_epoch(epoch, loss, accuracy)` runs after every epoch.
+    """
+    x = np.asarray(train_x, dtype=np.float32)
+    y = np.asarray(train_y, dtype=np.float32)
+    shuffle = np.random.default_rng(None if seed is None else seed + 1)
+
+    def epoch_batches() -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        order = shuffle.permutation(len(x))
+        for start in range(0, len(x), batch_size):
+            rows = order[start:start + batch_size]
+            yield x[rows], y[rows]
+
+    return train_numpy_batches(epoch_batches, x.shape[1], y.shape[1], epochs=epochs,
+                               architecture=architecture, seed=seed, init=init, early_stopping=early_stopping,
+                               on_epoch=on_epoch)
+
+
+def train_numpy_batches(epoch_batches: Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]],
+                        input_dim: int, output_dim: int, *, epochs: int = 100,
+                        architecture: Dict[str, Any] | None = None, seed: int | None = None,
+                        init: Sequence[DenseLayer] | None = None, early_stopping: EarlyStopping | None = None,
+                        on_epoch: Callable[[int, float, float], Any] | None = None
+                        ) -> Tuple[NumpyDenseModel, Dict[str, List[float]]]:
+    """`train_numpy` over batches from `epoch_batches()` (called once per epoch).
+
+    The data never has to exist as one matrix, e.g. with `stream_batches`.
+    """
+    arch = architecture or ARCHITECTURE
+    rng = np.random.default_rng(seed)  # weights init + dropout masks
+    sizes = [input_dim, *arch["hidden"], output_dim]
+    if init is not None:
+        if [l.kernel.shape for l in init] != list(zip(sizes[:-1], sizes[1:])):
+            raise ValueError("init layers do not match the network shape")
+        kernels = [np.array(l.kernel, dtype=np.float32) for l in init]
+        biases = [np.array(l.bias, dtype=np.float32) for l in init]
+    else:
+        kernels = [_glorot_uniform(rng, a, b) for a, b in zip(sizes[:-1], sizes[1:])]
+        biases = [np.zeros(b, dtype=np.float32) for b in sizes[1:]]
+    params = [*kernels, *biases]
+    velocity = [np.zeros_like(p) for p in params]
+    lr, momentum, keep = arch["learning_rate"], arch["momentum"], 1.0 - arch["dropout"]
+    history: Dict[str, List[float]] = {"loss": [], "accuracy": []}
+
+    for _epoch in range(epochs):
+        loss_sum = 0.0
+        correct = 0
+        seen = 0
+        for xb, yb in epoch_batches():
+            seen += len(xb)
+            # Forward, keeping activations (and inverted-dropout masks) for backprop
+            acts = [xb]
+            masks = []
+            for kernel, bias in zip(kernels[:-1], biases[:-1]):
+                h = np.maximum(acts[-1] @ kernel + bias, 0.0)
+                mask = (rng.random(h.shape) < keep).astype(np.float32) / keep
+                masks.append(mask)
+                acts.append(h * mask)
+            probs = _softmax(acts[-1] @ kernels[-1] + biases[-1])
+            loss_sum += float(-np.sum(yb * np.log(np.clip(probs, 1e-7, 1.0))))
+            correct += int(np.sum(probs.argmax(axis=1) == yb.argmax(axis=1)))
+
+            # Backward: softmax + cross-entropy gives (p - y) / batch
+            delta = (probs - yb) / len(xb)
+            grads_k: List[np.ndarray] = [None] * len(kernels)  # type: ignore[list-item]
+            grads_b: List[np.ndarray] = [None] * len(biases)  # type: ignore[list-item]
+            for i in range(len(kernels) - 1, -1, -1):
+                grads_k[i] = acts[i].T @ delta
+                grads_b[i] = delta.sum(axis=0)
+                if i:
+                    delta = (delta @ kernels[i].T) * masks[i - 1] * (acts[i] > 0)
+            # Nesterov momentum, as keras.optimizers.SGD(nesterov=True)
+            for p, v, g in zip(params, velocity, [*grads_k, *grads_b]):
+                v *= momentum
+                v -= lr * g
+                p += momentum * v - lr * g
+        history["loss"].append(loss_sum / max(seen, 1))
+        history["accuracy"].append(correct / max(seen, 1))
+        if on_epoch is not None:
+            on_epoch(len(history["loss"]), history["loss"][-1], history["accuracy"][-1])
+        if early_stopping is not None and early_stopping(history["loss"][-1], history["accuracy"][-1]):
+            break
+
+    activations = ["relu"] * (len(kernels) - 1) + ["softmax"]
+    layers = [DenseLayer(k, b, a) for k, b, a in zip(kernels, biases, activations)]
+    return NumpyDenseModel(layers), history
+
+
+def _fit_keras(data: Tuple[np.ndarray, np.ndarray] | Iterator[Tuple[np.ndarray, np.ndarray]], *,
+               input_dim: int, output_dim: int, epochs: int, batch_size: int,
+               steps_per_epoch: int | None = None,
+               init: Sequence[DenseLayer] | None = None, architecture: Dict[str, Any] | None = None,
+               early_stopping: EarlyStopping | None = None,
+               on_epoch: Callable[[int, float, float], Any] | None = None,
+               on_start: Callable[[], Any] | None = None) -> Tuple[Any, Dict[str, List[float]]]:
+    """Fit the Keras network on dense (x, y) or on an endless batch iterator.
+
+    `init` seeds the Dense layers' weights (warm start); `early_stopping`
+    and `on_epoch` behave as in `train_numpy`. `on_start` runs once Keras
+    is imported, before the model is built.
+    """
     try:
         from keras.models import Sequential
         from keras.layers import Dense, Dropout, Input
         from keras.optimizers import SGD
+        from keras.callbacks import Callback
     except Exception as e:  # pragma: no cover - environment dependent
         raise RuntimeError("Keras backend not available to train model") from e
+    if on_start is not None:
+        on_start()
 
-    words, classes, documents = build_training_data(intents)
-    if not words or not classes:
-        raise ValueError("Intents are empty or invalid; cannot train.")
-    train_x, train_y = vectorize_training(words, classes, documents)
+    arch = architecture or ARCHITECTURE
+    callbacks = []
+    if early_stopping is not None or on_epoch is not None:
+        class _EpochEnd(Callback):
+            def on_epoch_end(self, epoch, logs=None):
+                logs = logs or {}
+                loss, accuracy = float(logs.get("loss", 0.0)), float(logs.get("accuracy", 0.0))
+                if on_epoch is not None:
+                    on_epoch(epoch + 1, loss, accuracy)
+                if early_stopping is not None and early_stopping(loss, accuracy):
+                    self.model.stop_training = True
+
+        callbacks.append(_EpochEnd())
 
     model = Sequential(name="chatbot_dense")
-    model.add(Input(shape=(train_x.shape[1],), name="input"))
-    model.add(Dense(128, activation="relu", name="inp_layer"))
-    model.add(Dropout(0.5, name="drop1"))
-    model.add(Dense(64, activation="relu", name="hidden"))
-    model.add(Dropout(0.5, name="drop2"))
-    model.add(Dense(train_y.shape[1], activation="softmax", name="out"))
+    model.add(Input(shape=(input_dim,), name="input"))
+    first, second = arch["hidden"]
+    model.add(Dense(first, activation="relu", name="inp_layer"))
+    model.add(Dropout(arch["dropout"], name="drop1"))
+    model.add(Dense(second, activation="relu", name="hidden"))
+    model.add(Dropout(arch["dropout"], name="drop2"))
+    model.add(Dense(output_dim, activation="softmax", name="out"))
+    if init is not None:
+        model.set_weights([w for layer in init for w in (layer.kernel, layer.bias)])
 
     # Remove deprecated `decay` arg; use learning_rate schedules if needed
-    sgd = SGD(learning_rate=0.001, momentum=0.9, nesterov=True)
+    sgd = SGD(learning_rate=arch["learning_rate"], momentum=arch["momentum"], nesterov=True)
     model.compile(loss="categorical_crossentropy", optimizer=sgd, metrics=["accuracy"])
 
-    model.fit(train_x, train_y, epochs=epochs, batch_size=batch_size, verbose=0)
+    if isinstance(data, tuple):
+        history = model.fit(data[0], data[1], epochs=epochs, batch_size=batch_size, verbose=0,
+                            callbacks=callbacks)
+    else:
+        history = model.fit(data, steps_per_epoch=steps_per_epoch, epochs=epochs, shuffle=False, verbose=0,
+                            callbacks=callbacks)
+    return model, history.history
+
+
+# Above this dense train_x size (bytes), train_and_save streams batches
+STREAMING_MIN_BYTES = 512 * 1024 * 1024
+
+TRAINERS = ("auto", "keras", "numpy")
+# "auto" trains corpora up to this many patterns with NumPy: no TF startup
+NUMPY_AUTO_MAX_PATTERNS = 5000
+
+
+def resolve_trainer(trainer: str, intents: Dict[str, Any]) -> str:
+    """Concrete trainer for `trainer` ("auto" picks NumPy if Keras is missing or the corpus is small)."""
+    if trainer not in TRAINERS:
+        raise ValueError(f"Unknown trainer: {trainer!r} (expected one of {TRAINERS})")
+    if trainer != "auto":
+        return trainer
+    import importlib.util
+
+    patterns = sum(len(it.get("patterns", [])) for it in intents.get("intents", []))
+    if patterns <= NUMPY_AUTO_MAX_PATTERNS or importlib.util.find_spec("keras") is None:
+        return "numpy"
+    return "keras"
+
+
+# Layer sizes and optimizer settings of the trained network; part of the
+# training key, so changing them invalidates previously cached models
+ARCHITECTURE: Dict[str, Any] = {
+    "hidden": [128, 64],
+    "dropout": 0.5,
+    "optimizer": "sgd",
+    "learning_rate": 0.001,
+    "momentum": 0.9,
+}
+
+# Default fine-tuning budget when train_and_save starts from a previous model
+WARM_START_EPOCHS = 20
+
+# batch_size=None: aim for about AUTO_BATCH_STEPS mini-batches per epoch
+AUTO_BATCH_STEPS = 64
+AUTO_BATCH_MIN, AUTO_BATCH_MAX = 8, 256
+# Ceiling on scaled_architecture's learning-rate factor: beyond it SGD with
+# momentum diverges on small corpora
+MAX_LR_SCALE = 8.0
+# Epoch ceiling for the adaptive mode (early stopping usually ends sooner)
+ADAPTIVE_MAX_EPOCHS = 300
+
+
+def auto_batch_size(num_documents: int) -> int:
+    """Power-of-two batch size giving ~AUTO_BATCH_STEPS steps per epoch."""
+    target = max(1, -(-num_documents // AUTO_BATCH_STEPS))
+    return max(AUTO_BATCH_MIN, min(AUTO_BATCH_MAX, 1 << (target - 1).bit_length()))
+
+
+def scaled_architecture(batch_size: int, base_batch_size: int = 5) -> Dict[str, Any]:
+    """ARCHITECTURE with the learning rate scaled by batch_size / base_batch_size.
+
+    Larger batches take proportionally fewer steps per epoch; the linear
+    scaling rule keeps progress per epoch comparable, up to MAX_LR_SCALE.
+    """
+    factor = min(max(batch_size, 1) / base_batch_size, MAX_LR_SCALE)
+    return {**ARCHITECTURE, "learning_rate": ARCHITECTURE["learning_rate"] * factor}
+
 
+def _float_layer(layer: DenseLayer | QuantizedDenseLayer) -> DenseLayer:
+    kernel = np.asarray(layer.kernel, dtype=np.float32)
+    scale = getattr(layer, "scale", None)
+    if scale is not None:
+        kernel = kernel * scale
+    return DenseLayer(kernel, np.asarray(layer.bias, dtype=np.float32), layer.activation)
+
+
+def warm_start_layers(previous: IntentModel, index: Index, classes: Sequence[str], *,
+                      architecture: Dict[str, Any] | None = None) -> List[DenseLayer] | None:
+    """Previous model's weights re-laid for a new vocabulary/class list.
+
+    First-layer rows follow their lemma to its new column and output columns
+    follow their class; rows and columns for new lemmas or classes start at
+    zero, so known inputs behave as before until fine-tuning. Returns None
+    when the models cannot share weights (other hidden sizes or featurizer).
+    """
+    engine = previous.model
+    if not isinstance(engine, NumpyDenseModel):
+        engine = NumpyDenseModel.from_keras(engine)
+    layers = [_float_layer(layer) for layer in engine.layers]
+    hidden = (architecture or ARCHITECTURE)["hidden"]
+    if len(layers) < 2 or [layer.kernel.shape[1] for layer in layers[:-1]] != list(hidden):
+        return None
+
+    first, out = layers[0], layers[-1]
+    if isinstance(index, HashingIndex) or isinstance(previous.index, HashingIndex):
+        if not (isinstance(index, HashingIndex) and isinstance(previous.index, HashingIndex)
+                and len(index) == len(previous.index)):
+            return None
+        first_kernel = first.kernel.copy()
+    else:
+        first_kernel = np.zeros((len(index), first.kernel.shape[1]), dtype=np.float32)
+        old_cols, new_cols = [], []
+        for old_col, word in enumerate(str(w) for w in previous.words):
+            new_col = index.get(word)
+            if new_col is not None:
+                old_cols.append(old_col)
+                new_cols.append(new_col)
+        first_kernel[new_cols] = first.kernel[old_cols]
+
+    out_kernel = np.zeros((out.kernel.shape[0], len(classes)), dtype=np.float32)
+    out_bias = np.zeros(len(classes), dtype=np.float32)
+    old_class = {tag: i for i, tag in enumerate(previous.classes)}
+    for new_col, tag in enumerate(classes):
+        old_col = old_class.get(tag)
+        if old_col is not None:
+            out_kernel[:, new_col] = out.kernel[:, old_col]
+            out_bias[new_col] = out.bias[old_col]
+
+    return [DenseLayer(first_kernel, first.bias.copy(), first.activation),
+            *layers[1:-1],
+            DenseLayer(out_kernel, out_bias, out.activation)]
+
+
+def training_key(intents: Dict[str, Any], *, epochs: int, batch_size: int | None,
+                 tokenizer: str = DEFAULT_TOKENIZER, architecture: Dict[str, Any] | None = None,
+                 trainer: str = "keras", hash_dim: int | None = None, patience: int | None = None,
+                 warm_start: str | None = None, warm_epochs: int | None = None) -> str:
+    """Content address of a training run: normalized intents + hyperparameters.
+
+    Only what reaches the network counts: tags and patterns (whitespace
+    trimmed, intents in tag order). Responses, comments or key order do not.
+    Fine-tuned runs add the starting model's content hash (`warm_start`)
+    and their epoch budget, so they never stand in for a full run.
+    """
+    normalized = sorted(
+        (str(it.get("tag")), [" ".join(str(p).split()) for p in it.get("patterns", [])])
+        for it in intents.get("intents", [])
+    )
+    return intents_hash({
+        "intents": normalized,
+        "epochs": epochs,
+        "batch_size": batch_size,
+        "tokenizer": tokenizer,
+        "architecture": architecture or ARCHITECTURE,
+        "trainer": trainer,
+        "hash_dim": hash_dim,
+        "patience": patience,
+        "bundle_format": BUNDLE_FORMAT_VERSION,
+        **({"warm_start": warm_start, "warm_epochs": warm_epochs} if warm_start else {}),
+    })
+
+
+def _cached_training(registry: ModelRegistry, key: str | None = None, *,
+                     entry: RegistryEntry | None = None, label: str | None = None) -> IntentArtifacts | None:
+    if entry is None and key is not None:
+        entry = registry.by_training_key(key)
+    if entry is None:
+        return None
+    model_path = registry.resolve(entry)
+    keras_path = next((registry.directory / f for f in entry.files if f.endswith(".keras")), None)
+    if not model_path.exists() or (keras_path is not None and not keras_path.exists()):
+        return None
+    if label:
+        registry.add_label(entry, label)  # the new label must resolve to the reused model
+    return IntentArtifacts(model_path=model_path, keras_path=keras_path, cached=True)
+
+
+def train_and_save(intents: Dict[str, Any], out_dir: str | Path, *,
+                   epochs: int = 100, batch_size: int | None = 5, tokenizer: str = DEFAULT_TOKENIZER,
+                   label: str | None = None, keep: int | None = DEFAULT_KEEP,
+                   protect: Iterable[str | Path] = (), force: bool = False, processes: int | None = None,
+                   trainer: str = "auto", seed: int | None = None,
+                   streaming: bool | None = None, hash_dim: int | None = None,
+                   warm_start: str | Path | None = None, warm_epochs: int = WARM_START_EPOCHS,
+                   patience: int | None = None,
+                   progress: Callable[[TrainingProgress], None] | None = None) -> IntentArtifacts:
+    """Train a small dense NN and save it as a single-file bundle.
+
+    Returns paths to the model bundle (.bundle) and, when trained with
+    Keras, the native Keras model (.keras) kept next to it for the "keras"
+    backend. The tokenizer name is recorded in the bundle so inference
+    tokenizes the same way.
+
+    `trainer` is "keras", "numpy" (`train_numpy`, never imports TensorFlow)
+    or "auto": NumPy for corpora up to NUMPY_AUTO_MAX_PATTERNS patterns or
+    when Keras is not installed, Keras otherwise.
+
+    The model is appended to the directory's registry manifest; only the
+    `keep` newest models are retained (None keeps everything), plus the
+    `protect` paths (e.g. the model being served) and `warm_start`. If a model
+    with the same `training_key` is registered and still on disk it is
+    returned as is (``cached=True``) without training; `force` retrains.
+    `processes` > 1 tokenizes new patterns in worker processes.
+
+    `streaming` trains from sparse rows, densifying one prefetched batch at
+    a time, so memory is bounded by the batch size rather than the corpus
+    (None: only when the dense matrix would exceed STREAMING_MIN_BYTES).
+
+    `hash_dim` featurizes with a `HashingIndex` of that width instead of the
+    vocabulary: the bundle then ships no word list and the input layer keeps
+    its size however many patterns are added.
+
+    `warm_start` (a model path, usually the active one) initializes the
+    network from that model via `warm_start_layers` and fine-tunes for
+    `warm_epochs` instead of `epochs`. Models that cannot share weights
+    are ignored and training starts from scratch.
+
+    `batch_size=None` sizes batches from the corpus (`auto_batch_size`) and
+    scales the learning rate to match (`scaled_architecture`). `patience`
+    stops once training loss and accuracy stop improving for that many
+    epochs (`EarlyStopping`); `epochs` is then an upper bound. The epochs
+    actually run, the batch size and the wall time are recorded in the
+    bundle metadata and the registry.
+
+    `progress` receives a `TrainingProgress` when each stage starts and
+    after every epoch (and after each tokenized chunk while preparing);
+    raising `TrainingCancelled` from it aborts the run before anything is
+    saved. Nothing is reported after the "save" stage starts.
+    """
+    get_tokenizer(tokenizer)  # fail fast on unknown names
+    trainer = resolve_trainer(trainer, intents)
+    t0 = time.perf_counter()
+    started = t0
+
+    def report(stage: str, epoch: int = 0, loss: float | None = None, accuracy: float | None = None) -> None:
+        if progress is None:
+            return
+        now = time.perf_counter()
+        eta = (now - started) / epoch * (epochs - epoch) if stage == "train" and epoch else None
+        progress(TrainingProgress(stage, epoch, epochs, loss, accuracy, now - t0, eta))
+
+    hashing = HashingIndex(hash_dim) if hash_dim is not None else None
     out_dir = Path(out_dir)
+    key = training_key(intents, epochs=epochs, batch_size=batch_size, tokenizer=tokenizer, trainer=trainer,
+                       hash_dim=hash_dim, patience=patience)
+    base_key = key  # from scratch, recorded so fine-tunes of an unchanged corpus can be skipped
+    registry = ModelRegistry.open(out_dir)
+    warm_key = None
+    if warm_start is not None and Path(warm_start).is_file():
+        warm_key = training_key(intents, epochs=warm_epochs, batch_size=batch_size, tokenizer=tokenizer,
+                                trainer=trainer, hash_dim=hash_dim, patience=patience,
+                                warm_start=file_hash(warm_start), warm_epochs=warm_epochs)
+    if not force:
+        cached = _cached_training(registry, key, label=label)
+        if cached is None and warm_key is not None:
+            cached = _cached_training(registry, warm_key, label=label)
+            source = registry.get(warm_start) if cached is None else None
+            # The model to fine-tune from was already trained on these intents
+            if (source is not None and source.meta.get("base_key") == key
+                    and registry.resolve(source).resolve() == Path(warm_start).resolve()):
+                cached = _cached_training(registry, entry=source, label=label)
+        if cached is not None:
+            print(f"[chatbot] Sin cambios en intents ni parámetros, se reutiliza {cached.model_path.name}")
+            return cached
+    report("prepare")
+    ensure_nltk()
+    report("prepare")  # cancellation point after loading NLTK data
+    print(f"[chatbot] Inicio de entrenamiento ({trainer})")
+
+    pattern_cache = PatternCache.open(out_dir / PATTERN_CACHE_NAME)
+    # Each analyzed chunk is a cancellation point
+    words, classes, documents = build_training_data(intents, tokenizer, cache=pattern_cache, processes=processes,
+                                                    on_chunk=(lambda: report("prepare")) if progress else None)
+    if not words or not classes:
+        raise ValueError("Intents are empty or invalid; cannot train.")
+    index = hashing or VocabIndex(words)
+    input_dim = len(index)
+    architecture = None
+    if batch_size is None:
+        batch_size = auto_batch_size(len(documents))
+        architecture = scaled_architecture(batch_size)
+        print(f"[chatbot] Tamaño de lote automático: {batch_size}")
+    if streaming is None:
+        streaming = 4 * len(documents) * input_dim > STREAMING_MIN_BYTES
+    if streaming:
+        # Sparse rows only; dense batches are built on the fly, one at a time
+        features, labels = featurize_documents(index, classes, documents, lemmas=pattern_cache.lemmas())
+        shuffle = np.random.default_rng(None if seed is None else seed + 1)
+
+        def epoch_batches() -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+            return stream_batches(features, labels, input_dim, len(classes), batch_size, shuffle)
+    else:
+        train_x, train_y = vectorize_training(index, classes, documents, lemmas=pattern_cache.lemmas())
+    pattern_cache.save()
+    init = None
+    if warm_start is not None:
+        try:
+            previous = load_artifacts(warm_start, backend="numpy")
+            if previous.tokenizer == tokenizer:
+                init = warm_start_layers(previous, index, classes)
+        except Exception as e:
+            print(f"[chatbot] No se pudo cargar {warm_start} para continuar el entrenamiento: {e}")
+        if init is None:
+            print("[chatbot] Modelo previo incompatible, entrenamiento desde cero")
+        else:
+            epochs = warm_epochs
+            key = warm_key or key
+            print(f"[chatbot] Ajuste fino desde {Path(warm_start).name} ({epochs} épocas)")
+    stopper = EarlyStopping(patience) if patience else None
+    on_epoch = (lambda epoch, loss, accuracy: report("train", epoch, loss, accuracy)) if progress else None
+    # Keras' first import is slow: report again once it is done (a cancellation point)
+    on_start = (lambda: report("train")) if progress else None
+    started = time.perf_counter()
+    report("train")
+
+    keras_model = None
+    if trainer == "keras":
+        if streaming:
+            def endless() -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+                while True:
+                    yield from epoch_batches()
+
+            batches = prefetch(endless())
+            try:
+                keras_model, history = _fit_keras(batches, input_dim=input_dim, output_dim=len(classes), epochs=epochs,
+                                                  batch_size=batch_size,
+                                                  steps_per_epoch=-(-len(documents) // batch_size), init=init,
+                                                  architecture=architecture, early_stopping=stopper,
+                                                  on_epoch=on_epoch, on_start=on_start)
+            finally:
+                batches.close()
+        else:
+            keras_model, history = _fit_keras((train_x, train_y), input_dim=train_x.shape[1],
+                                              output_dim=train_y.shape[1], epochs=epochs, batch_size=batch_size,
+                                              init=init, architecture=architecture, early_stopping=stopper,
+                                              on_epoch=on_epoch, on_start=on_start)
+        engine = NumpyDenseModel.from_keras(keras_model)
+    elif streaming:
+        engine, history = train_numpy_batches(lambda: prefetch(epoch_batches()), input_dim, len(classes),
+                                              epochs=epochs, seed=seed, init=init, architecture=architecture,
+                                              early_stopping=stopper, on_epoch=on_epoch)
+    else:
+        engine, history = train_numpy(train_x, train_y, epochs=epochs, batch_size=batch_size, seed=seed, init=init,
+                                      architecture=architecture, early_stopping=stopper, on_epoch=on_epoch)
+    train_seconds = time.perf_counter() - started
+    accuracy = (history.get("accuracy") or [None])[-1]
+    epochs_run = len(history.get("loss") or []) or epochs
+    if epochs_run < epochs:
+        print(f"[chatbot] Parada temprana tras {epochs_run}/{epochs} épocas")
+    report("save", epochs_run)
+
     out_dir.mkdir(parents=True, exist_ok=True)
     ts = __import__("datetime").datetime.now().strftime("%Y%m%d_%H%M%S")
     base = out_dir / f"model_{ts}"
-    # Save in native Keras format to avoid legacy HDF5 warning
-    model_path = base.with_suffix(".keras")
-    words_path = base.with_name(base.name + "_words.pkl")
-    classes_path = base.with_name(base.name + "_classes.pkl")
+    # Fine-tuning often finishes within the second; never overwrite a model
+    for n in itertools.count(1):
+        if not any(base.with_suffix(s).exists() for s in MODEL_SUFFIXES):
+            break
+        base = out_dir / f"model_{ts}_{n}"
+    bundle_path = base.with_suffix(BUNDLE_SUFFIX)
+    meta = {"created": ts, "tokenizer": tokenizer, "trainer": trainer, "epochs_run": epochs_run,
+            "batch_size": batch_size, "train_seconds": round(train_seconds, 3)}
+    if hashing is not None:
+        meta["featurizer"] = hashing.meta
+    keras_path = None
+    # Save artifacts (bundle last: its presence marks a complete model)
+    if keras_model is not None:
+        # Save in native Keras format to avoid legacy HDF5 warning
+        keras_path = base.with_suffix(".keras")
+        keras_model.save(str(keras_path))
+        meta["keras_model"] = keras_path.name
+    # Hashed models need no word list at inference time
+    save_bundle(bundle_path, engine, [] if hashing else words, classes,
+                lemmas=build_lemma_table(documents, words), meta=meta)
 
-    # Save artifacts
-    model.save(str(model_path))
-    with words_path.open("wb") as f:
-        pickle.dump(words, f)
-    with classes_path.open("wb") as f:
-        pickle.dump(classes, f)
+    registry.register(
+        bundle_path,
+        files=[keras_path] if keras_path is not None else [],
+        intents_hash=intents_hash(intents),
+        training_key=key,
+        vocab_size=input_dim,  # hash_dim for hashed models, not the lemma count
+        num_classes=len(classes),
+        train_seconds=round(train_seconds, 3),
+        accuracy=None if accuracy is None else float(accuracy),
+        label=label or None,
+        meta={"epochs": epochs, "batch_size": batch_size, "tokenizer": tokenizer, "trainer": trainer,
+              "streaming": streaming, "hash_dim": hash_dim,
+              "warm_start": Path(warm_start).name if init is not None else None,
+              "epochs_run": epochs_run, "patience": patience, "base_key": base_key},
+    )
+    if keep is not None:
+        registry.gc(keep, protect=[*protect, *([warm_start] if warm_start is not None else [])])
 
     print("[chatbot] Fin de entrenamiento")
-    return IntentArtifacts(model_path=model_path, words_path=words_path, classes_path=classes_path, intents_path=None)
+    return IntentArtifacts(model_path=bundle_path, keras_path=keras_path, warm_started=init is not None)
 
 
 def write_vocab_sidecars_from_intents(intents: Dict[str, Any], model_path: str | Path) -> Tuple[Path, Path]:
-    """Utility for environments without Keras: persist words/classes for predict-time use
-    even if the model is a mock file. Returns (words_path, classes_path).
+    """Write the legacy `<model>_words.pkl` / `<model>_classes.pkl` sidecars for `model_path`.
+
+    Only needed for Keras/H5 models trained outside `train_and_save` (bundles
+    carry their vocabulary); `load_artifacts` reads these next to such a
+    model. Returns (words_path, classes_path).
     """
     words, classes, documents = build_training_data(intents)
     model_p = Path(model_path)
@@ -0,0 +1,122 @@
+"""
+LRU pool of loaded intent models, bounded by a memory budget.
+
+Entries are keyed by the artifact's resolved path plus its mtime and size
+(and the load options), so switching back to a recently used model is a
+dict lookup while a retrained file at the same path is loaded afresh.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Tuple
+import threading
+
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class PoolStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    resident_bytes: int
+    budget_bytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def artifact_key(path: str | Path) -> Optional[Tuple[str, int, int]]:
+    """(resolved path, mtime_ns, size), or None if the file cannot be stat'ed."""
+    try:
+        p = Path(path).resolve()
+        st = p.stat()
+    except OSError:
+        return None
+    return str(p), st.st_mtime_ns, st.st_size
+
+
+def _model_nbytes(model: Any) -> int:
+    return int(getattr(model, "nbytes", 0) or 0)
+
+
+class ModelPool:
+    """Keep recently used models resident up to `budget_bytes` (LRU eviction).
+
+    `loader(path, **options)` builds a model on a miss. The most recently
+    loaded model is always kept, even when it alone exceeds the budget.
+    """
+
+    def __init__(self, loader: Callable[..., Any], *, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        if budget_bytes < 0:
+            raise ValueError("budget_bytes must be >= 0")
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str | Path, **options: Any) -> Any:
+        """Return the model for `path`, loading it only if not resident."""
+        fingerprint = artifact_key(path)
+        if fingerprint is None:
+            # Nothing to key on; let the loader report the problem
+            return self.loader(str(path), **options)
+        key = (fingerprint, tuple(sorted(options.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        model = self.loader(str(path), **options)
+        self._put(key, model)
+        return model
+
+    def _put(self, key: Hashable, model: Any) -> None:
+        nbytes = _model_nbytes(model)
+        with self._lock:
+            # A newer version of the same file replaces the stale entries (any options)
+            for stale in [k for k in self._entries if k[0][0] == key[0][0] and k[0] != key[0]]:
+                self._drop(stale)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (model, nbytes)
+            self._resident += nbytes
+            while self._resident > self.budget_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        _model, nbytes = self._entries.pop(key)
+        self._resident -= nbytes
+
+    def holds(self, model: Any) -> bool:
+        with self._lock:
+            return any(m is model for m, _ in self._entries.values())
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._resident = 0
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(self.hits, self.misses, self.evictions, len(self._entries),
+                             self._resident, self.budget_bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,302 @@
+"""
+Append-only manifest of the models in a generated-models directory.
+
+Every trained model appends one JSON line to `registry.jsonl` (path, content
+hash, intents hash, vocabulary/class counts, training time, accuracy, label).
+Garbage collection appends `remove` records instead of rewriting the file,
+until superseded records outnumber the live ones: the manifest is then
+rewritten atomically with just the live entries. A model reused for a new
+label gets an alias instead of a copy. Opening a registry replays the
+manifest once into in-memory indexes, so "latest" and "by label" lookups
+never glob or stat the model files. A directory without a manifest is
+scanned a single time to seed it.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .bundle import BUNDLE_SUFFIX, read_bundle
+
+REGISTRY_NAME = "registry.jsonl"
+MODEL_SUFFIXES = (BUNDLE_SUFFIX, ".keras", ".h5")
+SIDECAR_SUFFIXES = ("_words.pkl", "_classes.pkl")
+DEFAULT_KEEP = 10
+
+
+def file_hash(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def append_lines(path: str | Path, lines: Iterable[str]) -> None:
+    """Append newline-terminated `lines` to a JSON-lines file, crash-safely.
+
+    Everything goes out in one write and is fsynced. A torn last line left
+    by an interrupted writer is terminated first, so it cannot swallow the
+    first new record (readers already skip the torn line itself).
+    """
+    data = "".join(lines).encode("utf-8")
+    with Path(path).open("a+b") as f:
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def intents_hash(intents: Dict[str, Any]) -> str:
+    """Stable hash of an intents document (key order does not matter)."""
+    canonical = json.dumps(intents, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RegistryEntry:
+    path: str  # model file name, relative to the registry directory
+    content_hash: str
+    created: float = field(default_factory=time.time)
+    intents_hash: Optional[str] = None
+    training_key: Optional[str] = None  # intents + hyperparameters (see nlp.training_key)
+    vocab_size: Optional[int] = None
+    num_classes: Optional[int] = None
+    train_seconds: Optional[float] = None
+    accuracy: Optional[float] = None
+    label: Optional[str] = None
+    aliases: List[str] = field(default_factory=list)  # further labels resolving to this model
+    files: List[str] = field(default_factory=list)  # companion artifacts removed with the model
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "RegistryEntry":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in record.items() if k in known})
+
+    @property
+    def labels(self) -> List[str]:
+        return ([self.label] if self.label else []) + self.aliases
+
+
+class ModelRegistry:
+    """In-memory view of a manifest; writes go straight to the append-only file."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.manifest = self.directory / REGISTRY_NAME
+        self._lock = threading.Lock()
+        self._entries: Dict[str, RegistryEntry] = {}  # insertion order == registration order
+        self._by_label: Dict[str, str] = {}
+        self._by_training_key: Dict[str, str] = {}
+        self._latest: Optional[str] = None
+        self._records = 0  # lines in the manifest, live or not
+
+    @classmethod
+    def open(cls, directory: str | Path) -> "ModelRegistry":
+        """Load the manifest, seeding it with a one-time scan if it is missing."""
+        registry = cls(directory)
+        if registry.manifest.exists():
+            registry._replay()
+        elif registry.directory.exists():
+            registry._seed_from_scan()
+        return registry
+
+    # ---- Lookups ----
+    def latest(self) -> Optional[RegistryEntry]:
+        return self._entries.get(self._latest) if self._latest else None
+
+    def by_label(self, label: str) -> Optional[RegistryEntry]:
+        """Most recent model registered (or aliased) with `label`."""
+        path = self._by_label.get(label)
+        return self._entries.get(path) if path else None
+
+    def by_training_key(self, key: str) -> Optional[RegistryEntry]:
+        """Most recent model trained from the same intents and hyperparameters."""
+        path = self._by_training_key.get(key)
+        return self._entries.get(path) if path else None
+
+    def get(self, path: str | Path) -> Optional[RegistryEntry]:
+        return self._entries.get(Path(path).name)
+
+    def entries(self) -> List[RegistryEntry]:
+        return list(self._entries.values())
+
+    def resolve(self, entry: RegistryEntry) -> Path:
+        return self.directory / entry.path
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, (str, Path)) and Path(path).name in self._entries
+
+    # ---- Writes ----
+    def register(self, model_path: str | Path, *, files: Iterable[str | Path] = (), **info: Any) -> RegistryEntry:
+        """Hash `model_path` and append it to the manifest as the latest model."""
+        p = Path(model_path)
+        entry = RegistryEntry(
+            path=p.name,
+            content_hash=file_hash(p),
+            files=[Path(f).name for f in files],
+            **info,
+        )
+        with self._lock:
+            self._append({"op": "add", **asdict(entry)})
+            self._add(entry)
+        return entry
+
+    def add_label(self, entry: RegistryEntry, label: str) -> RegistryEntry:
+        """Make `entry` resolve for `label` too and mark it as the latest model.
+
+        Used when a training run is served by an identical earlier model: the
+        new label gets no file of its own, just an alias on the existing entry.
+        """
+        if label in entry.labels:
+            return entry
+        aliased = replace(entry, aliases=[*entry.aliases, label])
+        with self._lock:
+            self._append({"op": "add", **asdict(aliased)})
+            self._add(aliased)
+        return aliased
+
+    def remove(self, entry: RegistryEntry, *, delete_files: bool = True) -> List[Path]:
+        """Forget `entry` and (by default) delete the model and its companion files."""
+        deleted: List[Path] = []
+        with self._lock:
+            if entry.path not in self._entries:
+                return deleted
+            self._append({"op": "remove", "path": entry.path, "removed": time.time()})
+            self._drop(entry.path)
+            if self._records - len(self._entries) > len(self._entries):
+                self._compact()
+        if delete_files:
+            for name in [entry.path, *entry.files]:
+                target = self.directory / name
+                try:
+                    target.unlink()
+                    deleted.append(target)
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+    def gc(self, keep: int = DEFAULT_KEEP, *, protect: Iterable[str | Path] = ()) -> List[Path]:
+        """Keep the `keep` newest models (plus `protect`); delete the rest.
+
+        The newest model of each label is kept too, so by-label lookups
+        keep resolving. Returns the deleted files.
+        """
+        if keep < 1:
+            raise ValueError("keep must be >= 1")
+        entries = self.entries()
+        retained = {e.path for e in entries[-keep:]}
+        retained.update(Path(p).name for p in protect)
+        retained.update(self._by_label.values())
+        deleted: List[Path] = []
+        for entry in entries:
+            if entry.path not in retained:
+                deleted += self.remove(entry)
+        return deleted
+
+    # ---- Internals ----
+    def _add(self, entry: RegistryEntry) -> None:
+        self._drop(entry.path)  # re-registration moves it to the end
+        self._entries[entry.path] = entry
+        self._latest = entry.path
+        for label in entry.labels:
+            self._by_label[label] = entry.path
+        if entry.training_key:
+            self._by_training_key[entry.training_key] = entry.path
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is None:
+            return
+        for label in entry.labels:
+            if self._by_label.get(label) != path:
+                continue
+            # Fall back to the previous model with that label, if any
+            older = [e.path for e in self._entries.values() if label in e.labels]
+            if older:
+                self._by_label[label] = older[-1]
+            else:
+                del self._by_label[label]
+        if entry.training_key and self._by_training_key.get(entry.training_key) == path:
+            del self._by_training_key[entry.training_key]
+        if self._latest == path:
+            self._latest = next(reversed(self._entries), None)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        append_lines(self.manifest, [json.dumps(record, ensure_ascii=False) + "\n"])
+        self._records += 1
+
+    def _compact(self) -> None:
+        """Rewrite the manifest with only the live entries (tmp file + rename)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest.with_name(self.manifest.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps({"op": "add", **asdict(entry)}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.manifest)
+        self._records = len(self._entries)
+
+    def _replay(self) -> None:
+        with self.manifest.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted write
+                self._records += 1
+                if record.get("op") == "remove":
+                    self._drop(record.get("path", ""))
+                else:
+                    self._add(RegistryEntry.from_record(record))
+
+    def _seed_from_scan(self) -> None:
+        models = [p for p in self.directory.iterdir() if p.is_file() and p.suffix in MODEL_SUFFIXES]
+        scanned: Dict[Path, Dict[str, Any]] = {}
+        companions: set = set()
+        for p in models:
+            info: Dict[str, Any] = {"created": p.stat().st_mtime, "files": []}
+            if p.suffix == BUNDLE_SUFFIX:
+                try:
+                    bundle = read_bundle(p)
+                    info["vocab_size"] = int(len(bundle["words"]))
+                    info["num_classes"] = int(len(bundle["classes"]))
+                    keras_name = bundle.meta.get("keras_model")
+                    if keras_name:
+                        info["files"].append(p.with_name(keras_name))
+                        companions.add(p.with_name(keras_name))
+                except Exception:
+                    pass
+            info["files"] += [p.with_name(p.stem + s) for s in SIDECAR_SUFFIXES if p.with_name(p.stem + s).exists()]
+            scanned[p] = info
+        # Bundles win over legacy files; within a kind, oldest first so the
+        # newest ends up as "latest"
+        order = sorted((p for p in scanned if p not in companions),
+                       key=lambda p: (p.suffix == BUNDLE_SUFFIX, scanned[p]["created"]))
+        for p in order:
+            info = scanned[p]
+            files = [Path(f).name for f in info.pop("files")]
+            self._add(RegistryEntry(path=p.name, content_hash=file_hash(p), files=files, **info))
+        if not self._entries:
+            return
+        try:
+            self._compact()
+        except OSError as e:
+            # Read-only storage: keep the scan in memory, seed again next time
+            print(f"[chatbot] No se pudo escribir {self.manifest}: {e}")
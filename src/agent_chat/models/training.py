@@ -0,0 +1,200 @@
+"""
+Out-of-process training jobs.
+
+`TrainingJob.start` runs `nlp.train_and_save` in a spawned process, so a
+long fit never competes with the UI process for the GIL. Every
+`nlp.TrainingProgress` (stage changes and one per epoch) streams back over a
+multiprocessing queue and is collected with `poll`. `cancel` asks the child
+to stop at its next progress report and, if it has not stopped within a
+grace period, terminates its whole process group (tokenizer pool workers
+included). Once the "save" stage has started a cancel is ignored and the
+run finishes, so model files, the registry and caches are never cut short.
+
+The child is not daemonic (it may start its own tokenizer pool), so jobs
+still running when the parent exits are terminated from an atexit hook.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+import weakref
+
+from . import nlp
+
+DEFAULT_CANCEL_GRACE = 5.0  # seconds between a cancel request and terminate()
+DEFAULT_SAVE_WAIT = 30.0  # how long terminate() lets a saving run finish
+
+_running: "weakref.WeakSet[TrainingJob]" = weakref.WeakSet()
+
+
+def _run(events: Any, cancel: Any, saving: Any, target: Callable[..., nlp.IntentArtifacts] | None,
+         intents: Dict[str, Any], out_dir: str, options: Dict[str, Any]) -> None:
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()  # own process group: terminating it also stops pool workers
+
+    def progress(p: nlp.TrainingProgress) -> None:
+        if p.stage == "save":
+            saving.set()  # before any file is written; the parent stops honouring cancel
+        elif cancel.is_set():
+            raise nlp.TrainingCancelled()
+        events.put(("progress", p))
+
+    try:
+        artifacts = (target or nlp.train_and_save)(intents, out_dir, progress=progress, **options)
+    except nlp.TrainingCancelled:
+        events.put(("cancelled", None))
+    except BaseException as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+    else:
+        events.put(("done", artifacts))
+
+
+class TrainingJob:
+    """Handle on one training run in a child process."""
+
+    def __init__(self, process: Any, events: Any, cancel_event: Any, saving_event: Any):
+        self._process = process
+        self._events = events
+        self._cancel = cancel_event
+        self._saving = saving_event
+        self._cancel_deadline: Optional[float] = None
+        self.progress: Optional[nlp.TrainingProgress] = None  # latest report
+        self.artifacts: Optional[nlp.IntentArtifacts] = None
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.done = False
+
+    @classmethod
+    def start(cls, intents: Dict[str, Any], out_dir: str, *,
+              target: Callable[..., nlp.IntentArtifacts] | None = None, **options: Any) -> "TrainingJob":
+        """Spawn a process running `target` (default `nlp.train_and_save`) with `options`."""
+        ctx = mp.get_context("spawn")  # no forked TF/Flet state in the child
+        events = ctx.Queue()
+        cancel_event = ctx.Event()
+        saving_event = ctx.Event()
+        process = ctx.Process(target=_run,
+                              args=(events, cancel_event, saving_event, target, intents, str(out_dir), options),
+                              # daemonic processes cannot start the tokenizer pool
+                              daemon=False, name="chatbot-training")
+        process.start()
+        print(f"[chatbot] Entrenamiento en proceso {process.pid}")
+        job = cls(process, events, cancel_event, saving_event)
+        _running.add(job)
+        return job
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid
+
+    def poll(self, timeout: float = 0.0) -> List[nlp.TrainingProgress]:
+        """Progress reports received since the last call (waits up to `timeout` for the first)."""
+        reports: List[nlp.TrainingProgress] = []
+        block = timeout > 0
+        while not self.done:
+            try:
+                kind, payload = self._events.get(block, timeout) if block else self._events.get_nowait()
+            except queue.Empty:
+                self._check_process()
+                break
+            block = False
+            if kind == "progress":
+                self.progress = payload
+                reports.append(payload)
+            else:
+                self._finish(kind, payload)
+        return reports
+
+    @property
+    def saving(self) -> bool:
+        """True once the child started writing its results (cancel is then ignored)."""
+        return self._saving.is_set()
+
+    def cancel(self, grace: float = DEFAULT_CANCEL_GRACE) -> None:
+        """Stop at the next epoch; terminate the process if still running after `grace` seconds.
+
+        Ignored once the run is saving its results.
+        """
+        if self.done or self._cancel_deadline is not None or self.saving:
+            return
+        self._cancel.set()
+        self._cancel_deadline = time.monotonic() + grace
+
+    def terminate(self, save_wait: float = DEFAULT_SAVE_WAIT) -> None:
+        """Stop the run now, pool workers included.
+
+        A run that is saving gets up to `save_wait` seconds to finish first.
+        """
+        if self.done:
+            return
+        if self.saving:
+            self._process.join(timeout=save_wait)
+        if not self._process.is_alive():
+            self.poll()  # ended on its own: collect its result
+            return
+        self._terminate()
+        self._process.join(timeout=1.0)
+        self._finish("cancelled", None)
+
+    def result(self, timeout: float | None = None) -> nlp.IntentArtifacts:
+        """Wait for the run to end; raises `TrainingCancelled` or RuntimeError on failure."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError("Training still running")
+            self.poll(timeout=0.1)
+        if self.cancelled:
+            raise nlp.TrainingCancelled()
+        if self.error is not None:
+            raise RuntimeError(f"Training failed: {self.error}")
+        return self.artifacts  # type: ignore[return-value]
+
+    # ---- Internals ----
+    def _check_process(self) -> None:
+        if self._cancel_deadline is not None and time.monotonic() >= self._cancel_deadline and not self.saving:
+            if self._process.is_alive():
+                print("[chatbot] El entrenamiento no respondió a la cancelación, se termina el proceso")
+                self._terminate()
+            self._process.join(timeout=1.0)
+            self._finish("cancelled", None)
+        elif not self._process.is_alive():
+            try:  # the last message may land just after the exit is seen
+                kind, payload = self._events.get(timeout=0.5)
+            except queue.Empty:
+                self._finish("error", f"training process exited with code {self._process.exitcode}")
+            else:
+                if kind == "progress":
+                    self.progress = payload
+                else:
+                    self._finish(kind, payload)
+
+    def _terminate(self) -> None:
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self._process.pid, signal.SIGTERM)
+                return
+            except (ProcessLookupError, PermissionError):
+                pass
+        self._process.terminate()
+
+    def _finish(self, kind: str, payload: Any) -> None:
+        _running.discard(self)
+        if kind == "done":
+            self.artifacts = payload
+        elif kind == "cancelled":
+            self.cancelled = True
+        else:
+            self.error = str(payload)
+        self.done = True
+        self._process.join(timeout=1.0)
+
+
+@atexit.register
+def _terminate_running() -> None:
+    for job in list(_running):
+        job.terminate()
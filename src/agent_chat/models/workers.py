@@ -0,0 +1,202 @@
+"""
+Multi-process inference workers sharing one copy of the model.
+
+The Dense weights, the vocabulary (as a searchable unicode array, empty for
+hashed models) and the class list are packed once into a
+`multiprocessing.shared_memory` block. Each worker process attaches to it and builds a NumPy `IntentModel` whose
+arrays are views into that block, so resident memory does not grow with the
+number of workers. Requests are spread over the workers by the pool's shared
+call queue; large batches are split in chunks and merged back in order.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+
+import numpy as np
+
+from . import nlp
+
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedModelSpec:
+    """Picklable description of a packed model (sent to each worker once)."""
+    shm_name: str
+    arrays: Dict[str, Tuple[int, Tuple[int, ...], str]]  # name -> (offset, shape, dtype)
+    activations: Tuple[str, ...]
+    wordnet_fallback: bool = False
+    tokenizer: str = nlp.DEFAULT_TOKENIZER
+    hash_dim: int | None = None  # HashingIndex width; None for vocabulary models
+
+
+class SharedModel:
+    """Owner of the shared memory block holding one packed IntentModel."""
+
+    def __init__(self, intent_model: nlp.IntentModel):
+        engine = intent_model.model
+        if not isinstance(engine, nlp.NumpyDenseModel):
+            engine = nlp.NumpyDenseModel.from_keras(engine)
+        words = np.array(list(intent_model.words), dtype=str)
+        arrays: Dict[str, np.ndarray] = {
+            "words": words,
+            "order": np.argsort(words, kind="stable"),
+            "classes": np.frombuffer(json.dumps(list(intent_model.classes)).encode("utf-8"), dtype=np.uint8),
+        }
+        lemmas = intent_model.lemmas
+        if lemmas is not None:
+            surfaces = sorted(lemmas)
+            arrays["lemma_surface"] = np.array(surfaces, dtype=str)
+            arrays["lemma_target"] = np.array([lemmas[w] for w in surfaces], dtype=str)
+        for i, layer in enumerate(engine.layers):
+            # Keep quantized kernels compressed (int8/float16 + scales)
+            arrays[f"kernel_{i}"] = np.ascontiguousarray(layer.kernel)
+            arrays[f"bias_{i}"] = np.ascontiguousarray(layer.bias, dtype=np.float32)
+            if getattr(layer, "scale", None) is not None:
+                arrays[f"scale_{i}"] = np.ascontiguousarray(layer.scale)
+
+        layout: Dict[str, Tuple[int, Tuple[int, ...], str]] = {}
+        offset = 0
+        for name, arr in arrays.items():
+            layout[name] = (offset, arr.shape, arr.dtype.str)
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, arr in arrays.items():
+            off, shape, dtype = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=off)[...] = arr
+        self.spec = SharedModelSpec(self.shm.name, layout, tuple(l.activation for l in engine.layers),
+                                    intent_model.wordnet_fallback, intent_model.tokenizer,
+                                    len(intent_model.index) if isinstance(intent_model.index, nlp.HashingIndex) else None)
+
+    @property
+    def nbytes(self) -> int:
+        return self.shm.size
+
+    def close(self) -> None:
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def attach(spec: SharedModelSpec) -> Tuple[shared_memory.SharedMemory, nlp.IntentModel]:
+    """Map a packed model into this process without copying the arrays."""
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=spec.shm_name, track=False)
+    else:  # Python < 3.13 has no track flag; the owner unlinks the block
+        shm = shared_memory.SharedMemory(name=spec.shm_name)
+
+    def view(name: str) -> np.ndarray:
+        off, shape, dtype = spec.arrays[name]
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off)
+        arr.flags.writeable = False
+        return arr
+
+    layers = nlp.layers_from_arrays({name: view(name) for name in spec.arrays}, spec.activations)
+    words = view("words")
+    lemmas = None
+    if "lemma_surface" in spec.arrays:
+        lemmas = nlp.lemma_table_from_arrays(view("lemma_surface"), view("lemma_target"))
+    classes = json.loads(view("classes").tobytes().decode("utf-8"))
+    model = nlp.IntentModel(
+        model=nlp.NumpyDenseModel(layers),
+        words=words,
+        classes=classes,
+        index=nlp.HashingIndex(spec.hash_dim) if spec.hash_dim else nlp.SortedVocabIndex(words, view("order")),
+        lemmas=lemmas,
+        wordnet_fallback=spec.wordnet_fallback,
+        tokenizer=spec.tokenizer,
+    )
+    return shm, model
+
+
+# ---------- Worker process side ----------
+
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(spec: SharedModelSpec) -> None:
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+    # Tokenizer data only (none for "regex"): models with a lemma table never need WordNet
+    if spec.tokenizer == "nltk":
+        nlp.ensure_nltk(*nlp.TOKENIZER_RESOURCES)
+    shm, model = attach(spec)
+    _WORKER["shm"] = shm  # keep the mapping alive for the process lifetime
+    _WORKER["model"] = model
+
+
+def _worker_predict(sentences: List[str]) -> List[Tuple[str, float]]:
+    return _WORKER["model"].predict_tags(sentences)
+
+
+def _worker_pid(_: int) -> int:
+    return os.getpid()
+
+
+# ---------- Dispatcher ----------
+
+
+class WorkerPool:
+    """Spread IntentModel predictions over N processes sharing one model copy.
+
+    Quacks like `IntentModel` (`predict_tag`, `predict_tags`, `classes`) so
+    `ChatBotModel` can route inference through it.
+    """
+
+    def __init__(self, intent_model: nlp.IntentModel, processes: int | None = None, *,
+                 min_chunk: int = 8):
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.min_chunk = max(1, min_chunk)
+        self.classes = list(intent_model.classes)
+        self.words = intent_model.words
+        self._shared = SharedModel(intent_model)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=mp.get_context("spawn"),  # no forked TF/Flet state in workers
+            initializer=_init_worker,
+            initargs=(self._shared.spec,),
+        )
+
+    @property
+    def shared_bytes(self) -> int:
+        return self._shared.nbytes
+
+    def warm_up(self) -> List[int]:
+        """Start every worker now; returns their PIDs."""
+        return sorted(set(self._executor.map(_worker_pid, range(self.processes * 4))))
+
+    def submit(self, sentences: List[str]) -> "Future[List[Tuple[str, float]]]":
+        return self._executor.submit(_worker_predict, list(sentences))
+
+    def predict_tags(self, sentences: List[str]) -> List[Tuple[str, float]]:
+        sentences = list(sentences)
+        if not sentences:
+            return []
+        chunk = max(self.min_chunk, math.ceil(len(sentences) / self.processes))
+        futures = [self.submit(sentences[i:i + chunk]) for i in range(0, len(sentences), chunk)]
+        out: List[Tuple[str, float]] = []
+        for fut in futures:  # ordered merge
+            out.extend(fut.result())
+        return out
+
+    def predict_tag(self, sentence: str) -> str:
+        return self.submit([sentence]).result()[0][0]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._shared.close()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,334 @@
+"""
+Headless HTTP/JSON chat server.
+
+Serves the same ChatController/ChatBotModel stack as the Flet app to many
+clients, without a UI. Only the standard library is used (asyncio streams),
+so it can be run and tested against localhost with no external services.
+
+Endpoints:
+- POST /chat        {"session": "abc", "message": "hola"} -> {"session", "response"}
+- POST /chat/batch  {"session": "abc", "messages": [...]}  -> {"session", "responses"}
+- GET  /health      model status
+- GET  /metrics     request counters, latencies, sessions, batching, cache and model pool stats
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, Tuple
+from weakref import WeakKeyDictionary
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+
+from agent_chat.controllers import ChatController
+from agent_chat.models import ChatBotModel, nlp
+
+MAX_BODY_BYTES = 1 << 20
+ROUTES = ("/health", "/metrics", "/chat", "/chat/batch")
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ChatServer:
+    """asyncio HTTP front-end; model work runs on a thread pool off the event loop."""
+
+    def __init__(self, model: ChatBotModel, *, max_sessions: int = 10000,
+                 history_limit: int = 200, threads: int = 4):
+        self.model = model
+        self.max_sessions = max_sessions
+        self.history_limit = history_limit
+        self._sessions: "OrderedDict[str, ChatController]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        # Serializes requests of one session (history appends + trim)
+        self._session_locks: "WeakKeyDictionary[ChatController, threading.Lock]" = WeakKeyDictionary()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="chat-worker")
+        self._server: asyncio.AbstractServer | None = None
+        self._started = time.time()
+        # route (or "other") -> [count, errors, total_ms, max_ms]
+        self._metrics: Dict[str, list] = {}
+
+    # ---- Lifecycle ----
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None, "server not started"
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None, "server not started"
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    # ---- Sessions ----
+    def session(self, session_id: str) -> ChatController:
+        """Return the controller holding this session's history (LRU bounded)."""
+        with self._sessions_lock:
+            ctl = self._sessions.get(session_id)
+            if ctl is None:
+                ctl = ChatController(self.model)
+                self._sessions[session_id] = ctl
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return ctl
+
+    def _session_lock(self, ctl: ChatController) -> threading.Lock:
+        with self._sessions_lock:
+            lock = self._session_locks.get(ctl)
+            if lock is None:
+                lock = self._session_locks[ctl] = threading.Lock()
+            return lock
+
+    def _trim_history(self, ctl: ChatController) -> None:
+        excess = len(ctl.messages) - self.history_limit
+        if excess > 0:
+            # Whole (user, bot) pairs only
+            del ctl.messages[:excess + excess % 2]
+
+    def _chat(self, session_id: str, message: str) -> str:
+        ctl = self.session(session_id)
+        with self._session_lock(ctl):
+            response = ctl.send_user_message(message)
+            self._trim_history(ctl)
+        return response
+
+    def _chat_batch(self, session_id: str, messages: list) -> list:
+        ctl = self.session(session_id)
+        with self._session_lock(ctl):
+            responses = ctl.send_user_messages(messages)
+            self._trim_history(ctl)
+        return responses
+
+    # ---- Routing ----
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        if path == "/health":
+            _require(method, "GET")
+            return 200, {
+                "status": "ok",
+                "model_path": self.model.model_path,
+                "active_model": self.model.has_active_model(),
+            }
+        if path == "/metrics":
+            _require(method, "GET")
+            return 200, self.metrics()
+        if path == "/chat":
+            _require(method, "POST")
+            data = _parse_json(body)
+            message = data.get("message")
+            if not isinstance(message, str):
+                raise HttpError(400, "'message' must be a string")
+            session_id = _session_id(data)
+            response = await loop.run_in_executor(self._executor, self._chat, session_id, message)
+            return 200, {"session": session_id, "response": response}
+        if path == "/chat/batch":
+            _require(method, "POST")
+            data = _parse_json(body)
+            messages = data.get("messages")
+            if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+                raise HttpError(400, "'messages' must be a list of strings")
+            session_id = _session_id(data)
+            responses = await loop.run_in_executor(self._executor, self._chat_batch, session_id, messages)
+            return 200, {"session": session_id, "responses": responses}
+        raise HttpError(404, f"No route for {path}")
+
+    def metrics(self) -> Dict[str, Any]:
+        endpoints = {
+            name: {
+                "requests": count,
+                "errors": errors,
+                "avg_ms": round(total_ms / count, 3) if count else 0.0,
+                "max_ms": round(max_ms, 3),
+            }
+            for name, (count, errors, total_ms, max_ms) in self._metrics.items()
+        }
+        pool = self.model.pool_stats()
+        stats = self.model.batching_stats()
+        batching = None
+        if stats is not None:
+            batching = {**asdict(stats), "avg_batch_size": stats.avg_batch_size, "avg_wait_ms": stats.avg_wait_ms}
+        return {
+            "uptime_s": round(time.time() - self._started, 3),
+            "sessions": len(self._sessions),
+            "endpoints": endpoints,
+            "batching": batching,
+            "model_pool": {**asdict(pool), "hit_ratio": round(pool.hit_ratio, 4)},
+            "caches": {
+                name: {**asdict(c), "hit_ratio": round(c.hit_ratio, 4)}
+                for name, c in self.model.cache_stats().items()
+            },
+        }
+
+    def _record(self, path: str, status: int, elapsed_ms: float) -> None:
+        # Unknown paths share one bucket: clients must not grow the metrics
+        m = self._metrics.setdefault(path if path in ROUTES else "other", [0, 0, 0.0, 0.0])
+        m[0] += 1
+        m[1] += int(status >= 400)
+        m[2] += elapsed_ms
+        m[3] = max(m[3], elapsed_ms)
+
+    # ---- HTTP plumbing ----
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                t0 = time.perf_counter()
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                self._record(path, status, (time.perf_counter() - t0) * 1000.0)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            writer.write(_encode_response(e.status, {"error": str(e)}, False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def _require(method: str, expected: str) -> None:
+    if method != expected:
+        raise HttpError(405, f"Use {expected}")
+
+
+def _parse_json(body: bytes) -> Dict[str, Any]:
+    try:
+        data = json.loads(body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise HttpError(400, f"Invalid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise HttpError(400, "Body must be a JSON object")
+    return data
+
+
+def _session_id(data: Dict[str, Any]) -> str:
+    session = data.get("session")
+    return str(session) if session else uuid.uuid4().hex
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """Parse one HTTP/1.1 request; returns None on a clean EOF."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line") from None
+    headers: Dict[str, str] = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length") from None
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    path = target.split("?", 1)[0]
+    return method.upper(), path, headers, body
+
+
+def _encode_response(status: int, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+# ---------- Entry point ----------
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Headless Agent Chat HTTP/JSON server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--model", help="Model file (defaults to the latest generated model)")
+    parser.add_argument("--backend", choices=("keras", "numpy"), default="numpy",
+                        help="Inference engine (numpy never imports TensorFlow)")
+    parser.add_argument("--threads", type=int, default=4, help="Threads running model work")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Inference processes sharing the model weights (0 = in-process)")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Enable micro-batching with this max batch size (0 = off)")
+    parser.add_argument("--batch-wait-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+    os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
+
+    model = ChatBotModel(backend=args.backend)
+    model_path = args.model or nlp.find_latest_model("storage/generated_models")
+    if model_path:
+        model.set_model_path(model_path)
+    if args.workers > 0:
+        model.start_workers(args.workers)
+    if args.batch_size > 0:
+        model.enable_batching(max_batch_size=args.batch_size, max_wait_ms=args.batch_wait_ms)
+
+    server = ChatServer(model, threads=max(args.threads, args.workers))
+
+    async def _run() -> None:
+        await server.start(args.host, args.port)
+        print(f"[server] Escuchando en http://{args.host}:{server.port} (modelo: {model.model_path})")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        model.disable_batching()
+        model.stop_workers()
+
+
+if __name__ == "__main__":
+    main()
@@ -96,41 +96,31 @@ def run(page: ft.Page):
                 # Graceful fallback: skip restore and continue
                 model_path = None
 
+            loading = None
             if model_path:
-                controller.select_model(str(model_path))
+                loading = model.load_model_async(str(model_path))
 
             else:
                 # Fallback: pick latest generated automatically
                 try:
-                    from pathlib import Path
-                    gen_dir = Path("storage/generated_models")
-                    if gen_dir.exists():
-                        models = list(gen_dir.glob("*.keras")) + list(gen_dir.glob("*.h5"))
-                        models = sorted(models, key=lambda p: p.stat().st_mtime, reverse=True)
-                        if models:
-                            controller.select_model(str(models[0]))
+                    from agent_chat.models import nlp
+                    latest = nlp.find_latest_model("storage/generated_models")
+                    if latest:
+                        loading = model.load_model_async(str(latest))
                 except Exception:
                     pass
+            if loading is not None:
+                # Loads off the UI thread; the chat keeps answering meanwhile
+                await __import__("asyncio").wrap_future(loading)
         finally:
             chat_view.set_loading(False)
             _refresh_app_status()
 
     page.run_task(_preload)
 
-    # Hook model changes from ConfigView to update status
-    # When user selects a model or training completes, call refresh
-    orig_select_model = controller.select_model
-    def _select_model_and_refresh(p):
-        orig_select_model(p)
+    # Every load attempt (controller, ConfigView, training) refreshes the status.
+    # Listeners run on the model-loader thread: hop onto the page's event loop.
+    async def _refresh_status_async():
         _refresh_app_status()
 
-    controller.select_model = _select_model_and_refresh
-
-    # Also wrap model.set_model_path so direct calls trigger status update
-    orig_model_set = model.set_model_path
-    def _model_set_and_refresh(p):
-        orig_model_set(p)
-        _refresh_app_status()
-    model.set_model_path = _model_set_and_refresh
-
-
+    model.add_load_listener(lambda _event: page.run_task(_refresh_status_async))
@@ -6,6 +6,7 @@ import json
 
 from agent_chat.models import ChatBotModel
 from agent_chat.models import nlp
+from agent_chat.models.training import TrainingJob
 
 
 class ConfigView(ft.Container):
@@ -16,12 +17,15 @@ class ConfigView(ft.Container):
         self.intents_last_confirmed: str | None = None
         self.last_trained_text: str | None = None
         self.edited_since_confirm: bool = False
+        self.training_job: TrainingJob | None = None
         
         # Controls
         self.model_path_text = ft.Text("No model selected")
-        self.pick_model_btn = ft.ElevatedButton("Choose model (.keras or .h5)", icon=Icons.FOLDER_OPEN)
+        self.pick_model_btn = ft.ElevatedButton("Choose model (.bundle, .keras or .h5)", icon=Icons.FOLDER_OPEN)
         self.file_picker = ft.FilePicker(on_result=self._on_pick_model)
         self.progress_bar = ft.ProgressBar(width=400, visible=False)
+        self.progress_text = ft.Text("", visible=False, size=12)
+        self.cancel_btn = ft.TextButton("Cancel training", icon=Icons.STOP, visible=False)
         self.train_btn = ft.ElevatedButton("Train", disabled=True, icon=Icons.PLAY_ARROW)
         self.confirm_btn = ft.OutlinedButton("Confirm", icon=Icons.CHECK_CIRCLE)
         self.edit_again_btn = ft.TextButton("Edit again", icon=Icons.EDIT)
@@ -58,6 +62,7 @@ class ConfigView(ft.Container):
         self.confirm_btn.on_click = self._confirm_intents
         self.edit_again_btn.on_click = self._edit_intents_again
         self.train_btn.on_click = self._start_training
+        self.cancel_btn.on_click = self._cancel_training
 
         # UI composition
         self.local_section = ft.Column([
@@ -71,8 +76,9 @@ class ConfigView(ft.Container):
             self.intents_editor,
             ft.Row([self.custom_version_text], alignment=ft.MainAxisAlignment.START),
             self.custom_label_field,
-            ft.Row([self.confirm_btn, self.edit_again_btn, self.train_btn], spacing=10),
+            ft.Row([self.confirm_btn, self.edit_again_btn, self.train_btn, self.cancel_btn], spacing=10),
             self.progress_bar,
+            self.progress_text,
         ], spacing=10, expand=True, scroll=ft.ScrollMode.AUTO)
 
         content = ft.Column([
@@ -90,6 +96,7 @@ class ConfigView(ft.Container):
     def did_mount(self):
         # Attach file picker to page and load initial state
         self.page.overlay.append(self.file_picker)
+        self.model.add_load_listener(self._on_model_loaded)
         # Restore persisted state via client_storage
         try:
             self._restore_persisted_state()  # defined below
@@ -105,6 +112,11 @@ class ConfigView(ft.Container):
         # Apply initial mode state
         self._on_mode_change(None)
 
+    def will_unmount(self):
+        self.model.remove_load_listener(self._on_model_loaded)
+        if self.training_job and not self.training_job.done:
+            self.training_job.terminate()
+
     # --- Helpers ---
     def _generated_dir(self) -> Path:
         d = Path("storage/generated_models")
@@ -113,14 +125,26 @@ class ConfigView(ft.Container):
 
     def _select_latest_generated_if_any(self):
         # Use latest generated if present (by default)
-        # Look for latest generated model in native Keras format first, then legacy H5
-        models = list(self._generated_dir().glob("*.keras")) + list(self._generated_dir().glob("*.h5"))
-        models = sorted(models, key=lambda p: p.stat().st_mtime, reverse=True)
-        if models:
-            latest = models[0]
-            self.model.set_model_path(str(latest))
+        # Bundles first, then legacy native Keras / H5 models
+        latest = nlp.find_latest_model(self._generated_dir())
+        if latest:
             self.model_path_text.value = f"Using latest generated: {latest}"
             self.update()
+            self.model.load_model_async(str(latest))
+
+    def _on_model_loaded(self, event):
+        # Runs on the loader thread once the new model is live (or failed):
+        # client_storage and update() belong to the page's event loop
+        page = self.page
+        if page is not None:
+            page.run_task(self._apply_model_loaded, event)
+
+    async def _apply_model_loaded(self, event):
+        if event.ok:
+            self._persist_state()
+        else:
+            self.model_path_text.value = f"Could not load {event.path}: {event.error}"
+        self.update()
 
     def _load_intents_json(self):
         try:
@@ -133,14 +157,11 @@ class ConfigView(ft.Container):
         if e.files:
             p = Path(e.files[0].path)
             self.selected_model_path = p
-            self.model.set_model_path(str(p))
+            # Text first: a fast failure's message from _on_model_loaded must not be overwritten
             self.model_path_text.value = str(p)
-            # Persist selection
-            try:
-                self._persist_state()
-            except Exception:
-                pass
             self.update()
+            # Loaded in the background; _on_model_loaded persists the selection
+            self.model.load_model_async(str(p))
 
     def _on_editor_change(self, e):
         self.edited_since_confirm = True
@@ -210,11 +231,24 @@ class ConfigView(ft.Container):
             pass
         self._refresh_custom_meta()
 
+    def _show_progress(self, p: nlp.TrainingProgress):
+        self.progress_bar.value = p.fraction
+        if p.stage == "train" and p.epoch:
+            text = f"Epoch {p.epoch}/{p.epochs} - loss {p.loss:.4f} - accuracy {p.accuracy:.3f}"
+            if p.eta is not None:
+                text += f" - ETA {p.eta:.0f}s"
+        else:
+            text = {"prepare": "Preparing data...", "train": "Training...", "save": "Saving model..."}.get(p.stage, "")
+        self.progress_text.value = text
+
     async def _train_async(self):
-        # Real training if Keras is available; otherwise simulated
+        # Keras for large corpora when installed, the NumPy trainer otherwise
         self.train_btn.disabled = True
         self.progress_bar.visible = True
         self.progress_bar.value = 0
+        self.progress_text.value = "Starting..."
+        self.progress_text.visible = True
+        self.cancel_btn.visible = True
         self.update()
         print("[ui] Inicio de entrenamiento")
         # Write intents to disk
@@ -230,73 +264,89 @@ class ConfigView(ft.Container):
             except Exception:
                 pass
 
-        async def _tick_progress(target: float):
-            # Smoothly animate progress to target
-            step = 0.02
-            while self.progress_bar.value < target:
-                self.progress_bar.value = min(target, self.progress_bar.value + step)
-                self.update()
-                await asyncio.sleep(0.05)
-
         model_path: Path | None = None
+        cached = False
+        warm_started = False
         try:
             if not intents_data:
                 raise ValueError("Intents empty")
-            # Initial progress
-            await _tick_progress(0.1)
-            # Real training
-            artifacts = await asyncio.get_running_loop().run_in_executor(
-                None, lambda: nlp.train_and_save(intents_data, self._generated_dir())
+            # Real training in a separate process ("auto": no TensorFlow needed),
+            # fine-tuning the active model if any; the chat stays responsive
+            active = getattr(self.model, "model_path", None)
+            warm_start = active if active and Path(active).exists() else None
+            self.training_job = job = TrainingJob.start(
+                intents_data, str(self._generated_dir()),
+                label=self.custom_label_field.value or None,
+                warm_start=warm_start,
+                protect=[active] if active else [],  # never GC the model being served
+                # Batch size from the corpus, stop on plateau
+                epochs=nlp.ADAPTIVE_MAX_EPOCHS, batch_size=None,
+                patience=nlp.EARLY_STOPPING_PATIENCE,
             )
+            while not job.done:
+                reports = job.poll()
+                if reports:
+                    self._show_progress(reports[-1])
+                    self.update()
+                await asyncio.sleep(0.1)
+            artifacts = job.result()
             model_path = artifacts.model_path
-            await _tick_progress(0.95)
-        except RuntimeError:
-            # No Keras backend: simulated fallback + save vocab
-            for i in range(11):
-                self.progress_bar.value = i / 10
-                self.update()
-                await asyncio.sleep(0.12)
-            ts = __import__("datetime").datetime.now().strftime("%Y%m%d_%H%M%S")
-            # Simulated artifact uses .keras extension to align with native format
-            model_path = self._generated_dir() / f"model_{ts}.keras"
-            model_path.write_text("mock model bytes", encoding="utf-8")
-            # Persist vocab to allow inference with real files
-            try:
-                if intents_data:
-                    nlp.write_vocab_sidecars_from_intents(intents_data, model_path)
-            except Exception:
-                pass
+            cached = artifacts.cached
+            warm_started = artifacts.warm_started
+        except nlp.TrainingCancelled:
+            self.page.snack_bar = ft.SnackBar(ft.Text("Training cancelled"))
+            self.page.snack_bar.open = True
+            self.train_btn.disabled = False
+            self.update()
+            return
         except Exception:
             # Generic error: close bar and notify
-            self.progress_bar.visible = False
             self.page.snack_bar = ft.SnackBar(ft.Text("Training error. Check intents.json"))
             self.page.snack_bar.open = True
             self.update()
             return
         finally:
+            self.training_job = None
             self.progress_bar.visible = False
+            self.progress_text.visible = False
+            self.cancel_btn.visible = False
             print("[ui] Fin de entrenamiento")
 
-        # Activate the generated model
+        # Activate the generated model (swapped in once fully loaded)
         if model_path:
-            self.model.set_model_path(str(model_path))
-        self.model.bump_version(label=self.custom_label_field.value)
+            await asyncio.wrap_future(self.model.load_model_async(str(model_path)))
+        label = self.custom_label_field.value
+        # A reused model is only a new version when it now carries another label
+        if not cached or label != self.model.custom_label:
+            self.model.bump_version(label=label)
         # Persist new model and meta
         try:
             self._persist_state()
         except Exception:
             pass
         self._refresh_custom_meta()
-        self.page.snack_bar = ft.SnackBar(ft.Text(f"Training complete. Model: {model_path.name}"))
+        if cached:
+            done = "Model unchanged, reused"
+        elif warm_started:
+            done = "Fine-tuned from the active model. Model:"
+        else:
+            done = "Training complete. Model:"
+        self.page.snack_bar = ft.SnackBar(ft.Text(f"{done} {model_path.name}"))
         self.page.snack_bar.open = True
         self.last_trained_text = self.intents_last_confirmed
         self.update()
 
     def _start_training(self, _):
-        if not self.use_generate.value:
+        if not self.use_generate.value or self.training_job is not None:
             return
         self.page.run_task(self._train_async)
 
+    def _cancel_training(self, _):
+        if self.training_job is not None and not self.training_job.saving:
+            self.training_job.cancel()
+            self.progress_text.value = "Cancelling..."
+            self.update()
+
     # --- Persistence via client_storage ---
     def _persist_state(self):
         cs = self.page.client_storage
@@ -331,6 +381,6 @@ class ConfigView(ft.Container):
             p = Path(str(model_path))
             if p.exists():
                 self.selected_model_path = p
-                self.model.set_model_path(str(p))
                 self.model_path_text.value = str(p)
+                self.model.load_model_async(str(p))
 
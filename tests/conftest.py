@@ -0,0 +1,18 @@
+import re
+
+import pytest
+
+from agent_chat.models import nlp
+
+
+class _IdentityLemmatizer:
+    def lemmatize(self, word: str) -> str:
+        return word
+
+
+@pytest.fixture()
+def offline_nltk(monkeypatch):
+    """Run the NLP pipeline without NLTK corpora (no downloads in CI)."""
+    monkeypatch.setattr(nlp, "ensure_nltk", lambda *resources: None)
+    monkeypatch.setattr(nlp.nltk, "word_tokenize", lambda s: re.findall(r"\w+|[^\w\s]", s))
+    monkeypatch.setattr(nlp, "lemmatizer", _IdentityLemmatizer())
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from agent_chat.models import ChatBotModel
+from agent_chat.models.batching import MicroBatcher
+
+
+class RecordingPredictor:
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+
+    def __call__(self, sentences):
+        self.batches.append(list(sentences))
+        time.sleep(self.delay)
+        return [s.upper() for s in sentences]
+
+
+def test_concurrent_requests_share_a_batch():
+    pred = RecordingPredictor()
+    with MicroBatcher(pred, max_batch_size=8, max_wait_ms=50) as batcher:
+        futures = [batcher.submit(f"m{i}") for i in range(8)]
+        assert [f.result(timeout=2) for f in futures] == [f"M{i}" for i in range(8)]
+        stats = batcher.stats()
+    assert pred.batches == [[f"m{i}" for i in range(8)]]
+    assert stats.batches == 1 and stats.full_flushes == 1
+    assert stats.avg_batch_size == 8
+    assert stats.peak_queue_depth >= 1
+
+
+def test_flushes_after_max_wait():
+    pred = RecordingPredictor()
+    with MicroBatcher(pred, max_batch_size=100, max_wait_ms=5) as batcher:
+        t0 = time.perf_counter()
+        assert batcher.predict("hi", timeout=2) == "HI"
+        assert time.perf_counter() - t0 < 1.0
+        assert batcher.stats().timeout_flushes == 1
+
+
+def test_threads_resolve_their_own_futures():
+    pred = RecordingPredictor(delay=0.01)
+    results = {}
+    with MicroBatcher(pred, max_batch_size=4, max_wait_ms=2) as batcher:
+        def worker(i):
+            results[i] = batcher.predict(f"s{i}", timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = batcher.stats()
+    assert results == {i: f"S{i}" for i in range(20)}
+    assert stats.requests == 20
+    assert all(len(b) <= 4 for b in pred.batches)
+
+
+def test_errors_propagate_and_queue_bound():
+    def boom(_sentences):
+        raise ValueError("bad model")
+
+    with MicroBatcher(boom, max_wait_ms=0) as batcher:
+        with pytest.raises(ValueError):
+            batcher.predict("x", timeout=2)
+        assert batcher.stats().errors == 1
+
+    gate = threading.Event()
+
+    def slow(sentences):
+        gate.wait(2)
+        return sentences
+
+    batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0, max_queue=1)
+    batcher.submit("a")  # picked up by the worker, blocks on the gate
+    time.sleep(0.05)
+    batcher.submit("b")  # fills the queue
+    with pytest.raises(RuntimeError):
+        batcher.submit("c")
+    gate.set()
+    batcher.close()
+    assert batcher.stats().rejected == 1
+    with pytest.raises(RuntimeError):
+        batcher.submit("d")
+
+
+def test_chat_bot_uses_batcher():
+    bot = ChatBotModel()
+    bot.set_intents({"intents": [{"tag": "greet", "responses": ["hola"]}]})
+
+    class FakeIntentModel:
+        def predict_tags(self, sentences):
+            return [("greet", 1.0) for _ in sentences]
+
+    bot._intent_model = FakeIntentModel()
+    bot.enable_batching(max_batch_size=4, max_wait_ms=1)
+    try:
+        assert bot.get_response("hi") == "hola"
+        assert bot.batching_stats().requests == 1
+    finally:
+        bot.disable_batching()
+    assert bot.batching_stats() is None
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from agent_chat.models import nlp
+from agent_chat.models.bundle import read_bundle, write_bundle
+
+
+def test_bundle_roundtrip_is_zero_copy(tmp_path: Path):
+    arrays = {
+        "weights": np.arange(12, dtype=np.float32).reshape(3, 4),
+        "names": np.array(["hola", "adiós"], dtype=str),
+        "empty": np.zeros(0, dtype=np.int64),
+    }
+    path = write_bundle(tmp_path / "m.bundle", arrays, {"note": "ñ"})
+    bundle = read_bundle(path)
+    assert bundle.meta == {"note": "ñ"}
+    for name, arr in arrays.items():
+        np.testing.assert_array_equal(bundle[name], arr)
+        assert not bundle[name].flags.writeable
+    base = bundle["weights"]
+    while base.base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)  # a view of the mapped file, not a copy
+    assert all(a.ctypes.data % 64 == 0 for a in bundle.arrays.values() if a.size)
+
+
+def test_read_bundle_rejects_other_files(tmp_path: Path):
+    bogus = tmp_path / "x.bundle"
+    bogus.write_bytes(b"mock model bytes")
+    with pytest.raises(ValueError):
+        read_bundle(bogus)
+
+
+def test_save_and_load_intent_bundle(tmp_path: Path, offline_nltk):
+    rng = np.random.default_rng(0)
+    engine = nlp.NumpyDenseModel([
+        nlp.DenseLayer(rng.normal(size=(3, 5)).astype(np.float32), np.zeros(5, np.float32), "relu"),
+        nlp.DenseLayer(rng.normal(size=(5, 2)).astype(np.float32), np.zeros(2, np.float32), "softmax"),
+    ])
+    words, classes = ["bye", "hello", "hi"], ["greet", "bye"]
+    path = nlp.save_bundle(tmp_path / "model_x.bundle", engine, words, classes,
+                           lemmas={"hellos": "hello"}, meta={"created": "now"})
+
+    loaded = nlp.load_artifacts(path)
+    assert isinstance(loaded.model, nlp.NumpyDenseModel)
+    assert list(loaded.words) == words and loaded.classes == classes
+    expected = nlp.IntentModel(model=engine, words=words, classes=classes)
+    sentences = ["hello there", "bye", "hi hello"]
+    np.testing.assert_allclose(loaded.predict_proba(sentences), expected.predict_proba(sentences))
+
+    bundle = read_bundle(path)
+    assert bundle.meta["created"] == "now"
+    assert list(bundle["lemma_surface"]) == ["hellos"] and list(bundle["lemma_target"]) == ["hello"]
+    with pytest.raises(FileNotFoundError):
+        nlp.load_artifacts(path, backend="keras")
+
+
+def test_find_latest_model_prefers_bundles(tmp_path: Path):
+    assert nlp.find_latest_model(tmp_path / "missing") is None
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    (legacy / "model_b.keras").write_text("x")
+    assert nlp.find_latest_model(legacy).name == "model_b.keras"
+    # The seeding scan prefers bundles even when a legacy file is newer
+    (tmp_path / "model_a.bundle").write_text("x")
+    (tmp_path / "model_b.keras").write_text("x")
+    assert nlp.find_latest_model(tmp_path).name == "model_a.bundle"
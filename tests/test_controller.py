@@ -29,3 +29,14 @@ def test_controller_select_model_calls_model(monkeypatch):
 
     assert called["times"] == 1
     assert called["arg"] == "/tmp/model.keras"
+
+
+def test_controller_bulk_messages_keep_order():
+    model = ChatBotModel()
+    ctl = ChatController(model)
+
+    replies = ctl.send_user_messages(["hello", "bye"])
+    assert len(replies) == 2
+    assert "Hi" in replies[0] and "Bye" in replies[1]
+    assert [m[0] for m in ctl.get_messages()] == ["user", "bot", "user", "bot"]
+    assert ctl.get_messages()[2] == ("user", "bye")
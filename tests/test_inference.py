@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from agent_chat.models import nlp
+from agent_chat.models.registry import ModelRegistry
+
+
+@pytest.fixture()
+def intents():
+    return {
+        "intents": [
+            {"tag": "greet", "patterns": ["hello there", "hi", "good morning"], "responses": ["hey"]},
+            {"tag": "bye", "patterns": ["bye", "see you later"], "responses": ["bye"]},
+            {"tag": "name", "patterns": ["what is your name", "who are you"], "responses": ["Juan"]},
+        ]
+    }
+
+
+def test_numpy_model_forward():
+    layers = [
+        nlp.DenseLayer(np.eye(2, dtype=np.float32), np.zeros(2, dtype=np.float32), "relu"),
+        nlp.DenseLayer(np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32), np.zeros(2, dtype=np.float32), "softmax"),
+    ]
+    model = nlp.NumpyDenseModel(layers)
+    out = model.predict(np.array([[2.0, -1.0]]))
+    assert out.shape == (1, 2)
+    assert np.isclose(out.sum(), 1.0)
+    assert out[0, 0] > out[0, 1]
+
+
+def test_numpy_model_rejects_unknown_activation():
+    with pytest.raises(ValueError):
+        nlp.NumpyDenseModel([nlp.DenseLayer(np.eye(2), np.zeros(2), "gelu")])
+
+
+def test_load_artifacts_rejects_unknown_backend(tmp_path: Path):
+    with pytest.raises(ValueError):
+        nlp.load_artifacts(tmp_path / "model.keras", backend="torch")
+
+
+def test_numpy_backend_matches_keras(tmp_path: Path, intents, offline_nltk):
+    try:
+        import keras  # noqa: F401
+    except Exception:
+        pytest.skip("Keras backend not available in this environment")
+
+    artifacts = nlp.train_and_save(intents, tmp_path, epochs=2, batch_size=4, trainer="keras")
+    keras_model = nlp.load_artifacts(artifacts.model_path, backend="keras")
+    numpy_model = nlp.load_artifacts(artifacts.model_path, backend="numpy")
+
+    assert isinstance(numpy_model.model, nlp.NumpyDenseModel)
+    assert list(numpy_model.words) == list(keras_model.words)
+    assert numpy_model.classes == keras_model.classes
+
+    rng = np.random.default_rng(0)
+    x = (rng.random((16, len(keras_model.words))) > 0.7).astype(np.float32)
+    expected = keras_model.model.predict(x, verbose=0)
+    np.testing.assert_allclose(numpy_model.model.predict(x), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(
+        nlp.NumpyDenseModel.from_keras(keras_model.model).predict(x), expected, rtol=1e-5, atol=1e-6
+    )
+    np.testing.assert_allclose(
+        nlp.NumpyDenseModel.from_keras_file(artifacts.keras_path).predict(x), expected, rtol=1e-5, atol=1e-6
+    )
+    for sentence in ("hello there", "see you later", "what is your name"):
+        assert numpy_model.predict_tag(sentence) == keras_model.predict_tag(sentence)
+
+
+def _random_engine(vocab=40, classes=3, seed=0):
+    rng = np.random.default_rng(seed)
+    return nlp.NumpyDenseModel([
+        nlp.DenseLayer(rng.normal(size=(vocab, 16)).astype(np.float32), rng.normal(size=16).astype(np.float32), "relu"),
+        nlp.DenseLayer(rng.normal(size=(16, 8)).astype(np.float32), rng.normal(size=8).astype(np.float32), "relu"),
+        nlp.DenseLayer(rng.normal(size=(8, classes)).astype(np.float32), np.zeros(classes, np.float32), "softmax"),
+    ])
+
+
+@pytest.mark.parametrize("mode,tol", [("int8", 0.05), ("float16", 1e-3)])
+def test_quantized_layers_track_float32(mode, tol):
+    engine = _random_engine()
+    quantized = nlp.NumpyDenseModel([nlp.quantize_layer(layer, mode) for layer in engine.layers])
+    assert quantized.nbytes < engine.nbytes
+    rng = np.random.default_rng(1)
+    sparse = (rng.random((32, 40)) > 0.9).astype(np.float32)
+    dense = rng.random((4, 40)).astype(np.float32)
+    for x in (sparse, dense):
+        np.testing.assert_allclose(quantized.predict(x), engine.predict(x), atol=tol)
+
+
+def test_quantize_bundle_reports_accuracy(tmp_path: Path, intents, offline_nltk):
+    words, classes, _docs = nlp.build_training_data(intents)
+    src = nlp.save_bundle(tmp_path / "model_x.bundle", _random_engine(len(words), len(classes)), words, classes)
+
+    report = nlp.quantize_bundle(src, intents, mode="int8")
+    assert report.path == tmp_path / "model_x.int8.bundle"
+    assert report.bytes_after < report.bytes_before
+    assert 0.0 <= report.accuracy_before <= 1.0 and 0.0 <= report.accuracy_after <= 1.0
+    assert report.accuracy_delta == pytest.approx(report.accuracy_after - report.accuracy_before)
+    assert "int8" in report.summary()
+
+    loaded = nlp.load_artifacts(report.path)
+    assert isinstance(loaded.model.layers[0], nlp.QuantizedDenseLayer)
+    assert loaded.model.layers[0].kernel.dtype == np.int8
+    original = nlp.load_artifacts(src)
+    assert loaded.predict_tags(["hello there"])[0][0] == original.predict_tags(["hello there"])[0][0]
+
+    with pytest.raises(ValueError):
+        nlp.quantize_bundle(src, mode="int4")
+    # Already-quantized inputs are validated too
+    with pytest.raises(ValueError):
+        nlp.quantize_bundle(report.path, mode="int4")
+
+    registry = ModelRegistry.open(tmp_path)
+    entry = registry.get(report.path)
+    assert entry is not None and entry.meta == {"quantization": "int8", "source": "model_x.bundle"}
+    assert nlp.find_latest_model(tmp_path) == report.path
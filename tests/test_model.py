@@ -1,7 +1,8 @@
+import threading
 import types
 import pytest
 
-from agent_chat.models import ChatBotModel, nlp
+from agent_chat.models import ChatBotModel, chat_bot, nlp
 
 
 @pytest.fixture()
@@ -21,12 +22,12 @@ def test_bot_empty_input(bot):
 
 def test_bot_with_loaded_intents_prediction(monkeypatch, bot):
     # Arrange: load intents data and a fake model that predicts index 0 -> 'greet'
-    bot._intents_data = {
+    bot.set_intents({
         "intents": [
             {"tag": "greet", "responses": ["hola", "hello there"]},
             {"tag": "bye", "responses": ["adios"]},
         ]
-    }
+    })
 
     class FakeModel:
         def predict(self, X, verbose=0):
@@ -50,3 +51,104 @@ def test_set_model_path_handles_errors(monkeypatch, bot):
     bot.set_model_path("/path/to/nonexistent.keras")
     assert bot._intent_model is None
 
+
+def test_get_responses_batches_and_falls_back(bot):
+    bot.set_intents({"intents": [{"tag": "greet", "responses": ["hola"]}, {"tag": "bye", "responses": ["adios"]}]})
+
+    class FakeIntentModel:
+        def __init__(self):
+            self.calls = []
+
+        def predict_tags(self, sentences):
+            self.calls.append(list(sentences))
+            return [("bye" if "bye" in s else "greet", 0.9) for s in sentences]
+
+    fake = FakeIntentModel()
+    bot._intent_model = fake
+    out = bot.get_responses(["hi", "", "ok bye"])
+    assert out == ["hola", "Please write a message.", "adios"]
+    assert fake.calls == [["hi", "ok bye"]]
+
+    # Without a model every message uses the keyword fallback
+    bot._intent_model = None
+    assert bot.get_responses(["hello", "zzzz"]) == [bot.get_response("hello"), bot.get_response("zzzz")]
+
+
+def test_set_model_path_clears_previous_cache(monkeypatch, bot):
+    cleared = []
+
+    class FakeIntentModel:
+        classes = ["greet"]
+
+        def clear_cache(self):
+            cleared.append(True)
+
+        def cache_stats(self):
+            return {}
+
+    bot._intent_model = FakeIntentModel()
+    monkeypatch.setattr(chat_bot, "load_artifacts", lambda *a, **k: FakeIntentModel())
+    bot.set_model_path("/path/to/other.bundle")
+    assert cleared == [True]
+    assert bot.cache_stats() == {}
+
+
+def test_load_model_async_swaps_atomically(monkeypatch, tmp_path, bot):
+    monkeypatch.chdir(tmp_path)  # no storage/intents.json: keep the compiled responses
+    bot.set_intents({"intents": [{"tag": "old", "responses": ["old answer"]},
+                                 {"tag": "new", "responses": ["new answer"]}]})
+
+    class FakeIntentModel:
+        def __init__(self, tag):
+            self.tag = tag
+            self.classes = [tag]
+
+        def predict_tag(self, sentence):
+            return self.tag
+
+        def clear_cache(self):
+            pass
+
+    bot._intent_model = FakeIntentModel("old")
+    gate = threading.Event()
+
+    def slow_load(path, **kwargs):
+        gate.wait(5)
+        if "broken" in path:
+            raise OSError("corrupt bundle")
+        return FakeIntentModel("new")
+
+    monkeypatch.setattr(chat_bot, "load_artifacts", slow_load)
+    events = []
+    bot.add_load_listener(events.append)
+
+    future = bot.load_model_async("/models/new.bundle")
+    # While the load is running the previous model keeps answering
+    assert bot.get_response("hi") == "old answer"
+    gate.set()
+    event = future.result(5)
+    assert event.ok and event.path == "/models/new.bundle" and event.elapsed_ms >= 0
+    assert bot.get_response("hi") == "new answer"
+    assert bot.model_path == "/models/new.bundle"
+
+    # A failed load is reported and leaves the current model in place
+    event = bot.load_model_async("/models/broken.bundle").result(5)
+    assert not event.ok and "corrupt bundle" in event.error
+    assert bot.get_response("hi") == "new answer"
+    assert bot.model_path == "/models/new.bundle"
+    assert [e.ok for e in events] == [True, False]
+
+
+def test_response_store_compiles_by_class_index():
+    data = {"intents": [
+        {"tag": "bye", "patterns": ["bye"], "responses": ["adios"]},
+        {"tag": "greet", "patterns": ["hi", "hello"], "responses": ["hola"]},
+        {"tag": "empty", "responses": []},
+    ]}
+    store = nlp.ResponseStore.from_intents(data, classes=["greet", "bye", "unused"])
+    assert store.classes == ("greet", "bye", "unused", "empty")
+    assert store.responses == (("hola",), ("adios",), (), ())
+    assert store.respond_index(1) == "adios"
+    assert store.respond("greet") == "hola"
+    assert store.respond("unused") == store.respond("missing") == nlp.NO_RESPONSE
+    assert not hasattr(store, "__dict__")  # patterns are not kept around
@@ -1,5 +1,6 @@
 from pathlib import Path
 import re
+import numpy as np
 import pytest
 
 from agent_chat.models import nlp
@@ -34,7 +35,166 @@ def test_build_training_data_and_vectorize(sample_intents, monkeypatch):
     assert y.shape[0] == len(docs)
 
 
+def test_vectorize_training_matches_reference(offline_nltk):
+    words = ["bye", "hello", "hi", "there"]
+    classes = ["greet", "bye"]
+    docs = [(["Hello", "there", "hello"], "greet"), (["hi"], "greet"), (["bye", "unknown"], "bye"), ([], "bye")]
+
+    # Straightforward per-word membership version, same shuffle
+    nlp.random.seed(7)
+    order = list(range(len(docs)))
+    nlp.random.shuffle(order)
+    expected_x = [[1.0 if w in [t.lower() for t in docs[i][0]] else 0.0 for w in words] for i in order]
+    expected_y = [[1.0 if c == docs[i][1] else 0.0 for c in classes] for i in order]
+
+    nlp.random.seed(7)
+    X, y = nlp.vectorize_training(words, classes, docs)
+    assert X.dtype == y.dtype == np.float32
+    assert X.tolist() == expected_x
+    assert y.tolist() == expected_y
+    with pytest.raises(ValueError):
+        nlp.vectorize_training(words, classes, [(["hi"], "unknown")])
+
+
 def test_respond_from_intents(sample_intents):
     msg = nlp.respond_from_intents("greet", sample_intents)
     assert msg in {"hey", "hello there"}
     assert nlp.respond_from_intents("unknown", sample_intents).startswith("I don't")
+
+
+def test_bag_of_words_batch_matches_single(monkeypatch):
+    monkeypatch.setattr(nlp, "tokenize_and_lemmatize", lambda s: re.findall(r"\w+", s.lower()))
+    vocab = ["bye", "hello", "world"]
+    sentences = ["Hello world!", "bye", "nothing here"]
+    bags = nlp.bag_of_words_batch(sentences, vocab)
+    assert bags.shape == (3, 3)
+    for row, s in zip(bags, sentences):
+        assert row.tolist() == nlp.bag_of_words(s, vocab).tolist()
+
+
+def test_predict_tags_single_predict_call(offline_nltk):
+    calls = []
+
+    class FakeModel:
+        def predict(self, X, verbose=0):
+            calls.append(X.shape)
+            # class 0 if "hello" present, else class 1
+            return [[0.9, 0.1] if row[0] else [0.2, 0.8] for row in X]
+
+    model = nlp.IntentModel(model=FakeModel(), words=["hello", "bye"], classes=["greet", "bye"])
+    out = model.predict_tags(["hello", "bye", "hello bye"])
+    assert calls == [(3, 2)]
+    assert [t for t, _ in out] == ["greet", "bye", "greet"]
+    assert out[1][1] == pytest.approx(0.8)
+    assert model.predict_tags([]) == []
+
+
+def test_prediction_cache_keys_on_feature_set(offline_nltk):
+    calls = []
+
+    class FakeModel:
+        def predict(self, X, verbose=0):
+            calls.append(X.shape[0])
+            return [[0.9, 0.1] if row[0] else [0.2, 0.8] for row in X]
+
+    model = nlp.IntentModel(model=FakeModel(), words=["hola", "adios"], classes=["greet", "bye"])
+    # Punctuation and case variants collapse onto the same active columns
+    out = model.predict_tags(["hola!", "Hola", "hola ??"])
+    assert calls == [1]
+    assert [t for t, _ in out] == ["greet"] * 3
+    model.predict_tags(["HOLA", "adios"])
+    assert calls == [1, 1]
+    stats = model.cache_stats()["predictions"]
+    # Duplicates inside one call are looked up once
+    assert (stats.hits, stats.misses, stats.currsize) == (1, 2, 2)
+    assert stats.hit_ratio == pytest.approx(1 / 3)
+
+    model.clear_cache()
+    model.predict_tag("hola")
+    assert calls == [1, 1, 1]
+
+
+def test_vocab_index_is_compiled_once(monkeypatch):
+    monkeypatch.setattr(nlp, "tokenize_and_lemmatize", lambda s: re.findall(r"\w+", s.lower()))
+    index = nlp.VocabIndex(["bye", "hello", "world"])
+    assert len(index) == 3
+    assert index.indices(["world", "zzz", "hello", "world"]) == (1, 2)
+    assert nlp.bag_of_words("hello hello world", index).tolist() == [0.0, 1.0, 1.0]
+    with pytest.raises(TypeError):
+        index._index["new"] = 3  # frozen
+
+    model = nlp.IntentModel(model=None, words=["bye", "hello"], classes=["a"])
+    assert isinstance(model.index, nlp.VocabIndex)
+    assert model.index.get("hello") == 1
+
+
+def test_sorted_vocab_index_matches_dict_index():
+    words = ["zeta", "alpha", "hello"]
+    sorted_index = nlp.SortedVocabIndex.from_words(words)
+    dict_index = nlp.VocabIndex(words)
+    tokens = ["hello", "helloworld", "alpha", "x", "alpha"]
+    assert sorted_index.indices(tokens) == dict_index.indices(tokens) == (1, 2)
+    assert sorted_index.get("zeta") == 0 and "hel" not in sorted_index
+    assert nlp.SortedVocabIndex.from_words([]).indices(["a"]) == ()
+
+
+def test_hashing_index_is_stable_and_bounded():
+    index = nlp.HashingIndex(16)
+    cols = index.indices(["hello", "world", "hello"])
+    assert cols == tuple(sorted(set(cols))) and all(0 <= c < 16 for c in cols)
+    assert nlp.HashingIndex(16).get("hello") == index.get("hello")  # no per-process salt
+    # Punctuation is ignored as in vocabularies: variants share one feature set
+    assert index.indices(["hello", "!", "?"]) == index.indices(["hello"])
+    bag = nlp.bag_of_words("hello world", index, analyzer=str.split)
+    assert bag.shape == (16,) and set(np.flatnonzero(bag)) == set(cols)
+    assert nlp.index_from_meta({"featurizer": index.meta}).size == 16
+    assert nlp.index_from_meta({}) is None
+    with pytest.raises(ValueError):
+        nlp.HashingIndex(0)
+
+
+class _PluralLemmatizer:
+    def __init__(self):
+        self.calls = []
+
+    def lemmatize(self, word):
+        self.calls.append(word)
+        return word[:-1] if word.endswith("s") and len(word) > 3 else word
+
+
+def test_build_lemma_table_covers_tokens_and_inflections(monkeypatch):
+    monkeypatch.setattr(nlp, "ensure_nltk", lambda *resources: None)
+    monkeypatch.setattr(nlp, "lemmatizer", _PluralLemmatizer())
+    docs = [(["Hello", "friends"], "greet"), (["bye"], "bye")]
+    table = nlp.build_lemma_table(docs, ["bye", "friend", "hello"])
+    assert table["hello"] == "hello" and table["friends"] == "friend"
+    assert table["byes"] == "bye"  # inflection of a vocabulary lemma
+    assert "hellos" in table and table["hellos"] == "hello"
+
+
+def test_inference_uses_lemma_table_not_wordnet(monkeypatch):
+    lem = _PluralLemmatizer()
+    monkeypatch.setattr(nlp, "lemmatizer", lem)
+    ensured = []
+    monkeypatch.setattr(nlp, "ensure_nltk", lambda *resources: ensured.extend(resources))
+    monkeypatch.setattr(nlp.nltk, "word_tokenize", lambda s: s.split())
+
+    model = nlp.IntentModel(model=None, words=["friend", "hello"], classes=["greet"],
+                            lemmas={"friends": "friend", "hello": "hello"})
+    assert model.analyze("Hello Friends zebras") == ["hello", "friend", "zebras"]
+    assert lem.calls == []
+    assert not {"wordnet", "omw-1.4"} & set(ensured)
+
+    model.wordnet_fallback = True
+    assert model.analyze("zebras") == ["zebra"]
+    assert lem.calls == ["zebras"]
+
+
+def test_toggling_wordnet_fallback_drops_cached_messages(monkeypatch):
+    monkeypatch.setattr(nlp, "lemmatizer", _PluralLemmatizer())
+    monkeypatch.setattr(nlp, "ensure_nltk", lambda *resources: None)
+    model = nlp.IntentModel(model=None, words=["friend"], classes=["greet"], lemmas={"friends": "friend"},
+                            tokenizer="regex")
+    assert model.analyze("zebras") == ["zebras"]
+    model.wordnet_fallback = True
+    assert model.analyze("zebras") == ["zebra"]
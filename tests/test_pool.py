@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from agent_chat.models import ChatBotModel, chat_bot
+from agent_chat.models.pool import ModelPool
+
+
+class FakeModel:
+    def __init__(self, path, nbytes):
+        self.path = path
+        self.nbytes = nbytes
+        self.classes = ["greet"]
+
+    def clear_cache(self):
+        pass
+
+
+def _files(tmp_path, *names):
+    paths = []
+    for name in names:
+        p = tmp_path / name
+        p.write_bytes(b"weights")
+        paths.append(p)
+    return paths
+
+
+def test_pool_reuses_resident_models_and_evicts_lru(tmp_path):
+    a, b, c = _files(tmp_path, "a.bundle", "b.bundle", "c.bundle")
+    loads = []
+
+    def loader(path, **options):
+        loads.append(os.path.basename(path))
+        return FakeModel(path, 100)
+
+    pool = ModelPool(loader, budget_bytes=250)
+    first = pool.get(a)
+    assert pool.get(a) is first
+    pool.get(b)
+    pool.get(a)  # a becomes most recently used
+    pool.get(c)  # over budget: b is evicted
+    assert loads == ["a.bundle", "b.bundle", "c.bundle"]
+    stats = pool.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (2, 3, 1, 2)
+    assert stats.resident_bytes == pool.resident_bytes == 200
+    assert pool.get(a) is first
+    pool.get(b)
+    assert loads[-1] == "b.bundle"
+
+
+def test_pool_reloads_when_the_file_changes(tmp_path):
+    (a,) = _files(tmp_path, "a.bundle")
+    pool = ModelPool(lambda path, **kw: FakeModel(path, 10))
+    first = pool.get(a, backend="numpy")
+    second = pool.get(a, backend="keras")
+    assert second is not first  # options are part of the key
+    # Both stay resident while the file is unchanged
+    assert pool.get(a, backend="numpy") is first and pool.get(a, backend="keras") is second
+    st = a.stat()
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert pool.get(a, backend="numpy") is not first
+    # The stale versions of the path were dropped
+    assert len(pool) == 1 and pool.resident_bytes == 10
+
+
+def test_bot_switches_back_without_reloading(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    a, b = _files(tmp_path, "a.bundle", "b.bundle")
+    loads = []
+
+    def fake_load(path, **kwargs):
+        loads.append(path)
+        return FakeModel(path, 1)
+
+    monkeypatch.setattr(chat_bot, "load_artifacts", fake_load)
+    bot = ChatBotModel()
+    for p in (a, b, a, b):
+        bot.set_model_path(str(p))
+    assert len(loads) == 2
+    assert bot.model_path == str(b)
+    assert bot.pool_stats().hits == 2
+
+
+def test_bot_compiles_responses_once_per_intents_version(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    a, b = _files(tmp_path, "a.bundle", "b.bundle")
+    intents = tmp_path / "storage" / "intents.json"
+    intents.parent.mkdir()
+    intents.write_text('{"intents": [{"tag": "greet", "patterns": ["hi"], "responses": ["hello"]}]}')
+    compiled = []
+    original = chat_bot.ResponseStore.from_intents
+    monkeypatch.setattr(chat_bot.ResponseStore, "from_intents",
+                        lambda data, classes=None: compiled.append(classes) or original(data, classes))
+    monkeypatch.setattr(chat_bot, "load_artifacts", lambda path, **kw: FakeModel(path, 1))
+    bot = ChatBotModel()
+    for p in (a, b, a):
+        bot.set_model_path(str(p))
+    assert len(compiled) == 1 and bot._responses is not None
+    st = intents.stat()
+    os.utime(intents, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    bot.set_model_path(str(b))
+    assert len(compiled) == 2
+
+
+def test_pool_rejects_negative_budget():
+    with pytest.raises(ValueError):
+        ModelPool(lambda path: None, budget_bytes=-1)
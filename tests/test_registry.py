@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from agent_chat.models import nlp
+from agent_chat.models.registry import REGISTRY_NAME, ModelRegistry, intents_hash
+
+
+def _model(directory, name, payload=b"weights", mtime=None):
+    p = directory / name
+    p.write_bytes(payload)
+    if mtime is not None:
+        os.utime(p, (mtime, mtime))
+    return p
+
+
+def test_register_latest_and_by_label(tmp_path):
+    registry = ModelRegistry.open(tmp_path)
+    a = registry.register(_model(tmp_path, "a.bundle"), label="prod", accuracy=0.9, vocab_size=3)
+    registry.register(_model(tmp_path, "b.bundle", b"other"), label="dev")
+    assert registry.latest().path == "b.bundle"
+    assert registry.by_label("prod") == a
+    assert registry.by_label("missing") is None
+    assert len(a.content_hash) == 64
+
+    # The manifest is append-only JSON lines and replays to the same state
+    lines = (tmp_path / REGISTRY_NAME).read_text().splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["add", "add"]
+    reopened = ModelRegistry.open(tmp_path)
+    assert reopened.latest().path == "b.bundle"
+    assert reopened.by_label("prod").accuracy == 0.9
+    assert nlp.find_latest_model(tmp_path) == tmp_path / "b.bundle"
+    assert nlp.find_latest_model(tmp_path, label="prod") == tmp_path / "a.bundle"
+
+
+def test_add_label_aliases_an_existing_model(tmp_path):
+    registry = ModelRegistry.open(tmp_path)
+    a = registry.register(_model(tmp_path, "a.bundle"), label="v1")
+    registry.register(_model(tmp_path, "b.bundle", b"other"), label="v2")
+    aliased = registry.add_label(a, "v3")
+    assert registry.add_label(aliased, "v3") is aliased
+    for reg in (registry, ModelRegistry.open(tmp_path)):
+        assert reg.by_label("v3").path == reg.by_label("v1").path == "a.bundle"
+        assert reg.latest().path == "a.bundle" and len(reg) == 2
+    # Removing the model drops every label it carried
+    registry.remove(aliased)
+    assert registry.by_label("v1") is registry.by_label("v3") is None
+
+
+def test_gc_deletes_old_artifacts_and_sidecars(tmp_path):
+    registry = ModelRegistry.open(tmp_path)
+    for i in range(4):
+        model = _model(tmp_path, f"m{i}.keras")
+        sidecars = [_model(tmp_path, f"m{i}_words.pkl"), _model(tmp_path, f"m{i}_classes.pkl")]
+        registry.register(model, files=sidecars, label="keepme" if i == 0 else None)
+    deleted = registry.gc(keep=2)
+    assert sorted(p.name for p in deleted) == ["m1.keras", "m1_classes.pkl", "m1_words.pkl"]
+    assert [e.path for e in ModelRegistry.open(tmp_path).entries()] == ["m0.keras", "m2.keras", "m3.keras"]
+    with pytest.raises(ValueError):
+        registry.gc(keep=0)
+
+
+def test_manifest_is_compacted_once_removals_dominate(tmp_path):
+    registry = ModelRegistry.open(tmp_path)
+    for i in range(30):
+        registry.register(_model(tmp_path, f"m{i}.bundle"), label="prod" if i == 3 else None)
+        registry.gc(keep=2)
+    lines = (tmp_path / REGISTRY_NAME).read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 2 * len(registry) + 1
+    reopened = ModelRegistry.open(tmp_path)
+    assert [e.path for e in reopened.entries()] == [e.path for e in registry.entries()]
+    assert reopened.latest().path == "m29.bundle" and reopened.by_label("prod").path == "m3.bundle"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_missing_manifest_is_seeded_by_one_scan(tmp_path):
+    _model(tmp_path, "old.keras", mtime=1_000)
+    _model(tmp_path, "old_words.pkl")
+    _model(tmp_path, "new.h5", mtime=2_000)
+    assert nlp.find_latest_model(tmp_path) == tmp_path / "new.h5"
+    assert (tmp_path / REGISTRY_NAME).exists()
+    registry = ModelRegistry.open(tmp_path)
+    assert registry.get("old.keras").files == ["old_words.pkl"]
+    # Later files are only seen once registered, not by globbing
+    _model(tmp_path, "unregistered.keras", mtime=3_000)
+    assert nlp.find_latest_model(tmp_path) == tmp_path / "new.h5"
+
+
+def test_intents_hash_ignores_key_order():
+    assert intents_hash({"a": 1, "b": [1, 2]}) == intents_hash({"b": [1, 2], "a": 1})
+    assert intents_hash({"a": 1}) != intents_hash({"a": 2})
+
+
+def test_seeding_a_read_only_directory_stays_in_memory(tmp_path, monkeypatch):
+    _model(tmp_path, "old.keras", mtime=1_000)
+    _model(tmp_path, "new.h5", mtime=2_000)
+
+    def read_only(self):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(ModelRegistry, "_compact", read_only)
+    assert nlp.find_latest_model(tmp_path) == tmp_path / "new.h5"
+    assert not (tmp_path / REGISTRY_NAME).exists()
+
+
+def test_append_after_a_torn_line_keeps_new_records(tmp_path):
+    registry = ModelRegistry.open(tmp_path)
+    registry.register(_model(tmp_path, "a.bundle"))
+    with (tmp_path / REGISTRY_NAME).open("a", encoding="utf-8") as f:
+        f.write('{"op": "add", "path": "torn')  # writer killed mid-line
+    registry.register(_model(tmp_path, "b.bundle"))
+    assert [e.path for e in ModelRegistry.open(tmp_path).entries()] == ["a.bundle", "b.bundle"]
@@ -0,0 +1,107 @@
+import asyncio
+import http.client
+import json
+
+from agent_chat.models import ChatBotModel
+from agent_chat.server import ChatServer
+
+
+def _request(port, method, path, payload=None, raw=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    body = raw if raw is not None else (json.dumps(payload) if payload is not None else None)
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = json.loads(resp.read())
+    conn.close()
+    return resp.status, data
+
+
+def _serve(scenario, **kwargs):
+    async def _main():
+        server = ChatServer(ChatBotModel(), **kwargs)
+        await server.start("127.0.0.1", 0)
+        try:
+            return server, await scenario(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(_main())
+
+
+def test_chat_endpoints_and_sessions():
+    async def scenario(server):
+        port = server.port
+        health = await asyncio.to_thread(_request, port, "GET", "/health")
+        first = await asyncio.to_thread(_request, port, "POST", "/chat", {"session": "s1", "message": "hello"})
+        batch = await asyncio.to_thread(
+            _request, port, "POST", "/chat/batch", {"session": "s1", "messages": ["bye", ""]}
+        )
+        other = await asyncio.to_thread(_request, port, "POST", "/chat", {"message": "hey"})
+        metrics = await asyncio.to_thread(_request, port, "GET", "/metrics")
+        return health, first, batch, other, metrics
+
+    server, (health, first, batch, other, metrics) = _serve(scenario)
+
+    assert health == (200, {"status": "ok", "model_path": None, "active_model": False})
+    assert first[0] == 200 and "Hi" in first[1]["response"]
+    assert batch[0] == 200
+    assert "Bye" in batch[1]["responses"][0]
+    assert batch[1]["responses"][1] == "Please write a message."
+    assert other[1]["session"] and other[1]["session"] != "s1"
+    assert [m[0] for m in server.session("s1").get_messages()] == ["user", "bot"] * 3
+
+    status, data = metrics
+    assert status == 200
+    assert data["sessions"] == 2
+    assert data["endpoints"]["/chat"]["requests"] == 2
+    assert data["batching"] is None
+
+
+def test_errors_and_session_limits():
+    async def scenario(server):
+        port = server.port
+        return [
+            await asyncio.to_thread(_request, port, "GET", "/nope"),
+            await asyncio.to_thread(_request, port, "GET", "/chat"),
+            await asyncio.to_thread(_request, port, "POST", "/chat", raw="{not json"),
+            await asyncio.to_thread(_request, port, "POST", "/chat/batch", {"messages": "hi"}),
+            *[
+                await asyncio.to_thread(_request, port, "POST", "/chat", {"session": f"s{i}", "message": "hi"})
+                for i in range(3)
+            ],
+        ]
+
+    server, results = _serve(scenario, max_sessions=2, history_limit=2)
+    assert [r[0] for r in results[:4]] == [404, 405, 400, 400]
+    assert all(r[0] == 200 for r in results[4:])
+    assert list(server._sessions) == ["s1", "s2"]
+    ctl = server.session("s2")
+    ctl.send_user_message("again")
+    server._trim_history(ctl)
+    assert len(ctl.get_messages()) == 2
+
+
+def test_unknown_paths_share_one_metrics_bucket():
+    async def scenario(server):
+        port = server.port
+        for i in range(5):
+            await asyncio.to_thread(_request, port, "GET", f"/random-{i}")
+        return await asyncio.to_thread(_request, port, "GET", "/metrics")
+
+    _server, (_status, data) = _serve(scenario)
+    assert set(data["endpoints"]) == {"other"}
+    assert data["endpoints"]["other"]["requests"] == 5 and data["endpoints"]["other"]["errors"] == 5
+
+
+def test_concurrent_requests_keep_session_history_paired():
+    async def scenario(server):
+        port = server.port
+        await asyncio.gather(*[
+            asyncio.to_thread(_request, port, "POST", "/chat", {"session": "s", "message": f"hi {i}"})
+            for i in range(16)
+        ])
+
+    server, _ = _serve(scenario, threads=8, history_limit=7)
+    messages = server.session("s").get_messages()
+    assert len(messages) == 6
+    assert [m[0] for m in messages] == ["user", "bot"] * 3
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+import pytest
+from nltk.tokenize import NLTKWordTokenizer
+
+from agent_chat.models import nlp
+
+STORAGE_INTENTS = Path(__file__).resolve().parent.parent / "storage" / "intents.json"
+
+CHAT_SAMPLES = [
+    "hello", "hi", "bye", "Hello, world!", "¿Cómo estás?", "¡Hola!", "hola!!", "qué tal",
+    "don't do that", "I'm fine, you're ok?", "can't won't", "you'll we've I'd", "It's 3.14 or 1,000",
+    "e-mail me at a@b.com", "wait...", '"quoted" text', "(paren) [b]", "U.S. army", "o'clock",
+    "50% off $5", "hola :)", "what is your name", "see you later",
+]
+
+
+def _intent_patterns():
+    data = json.loads(STORAGE_INTENTS.read_text(encoding="utf-8"))
+    return [p for it in data["intents"] for p in it["patterns"]]
+
+
+@pytest.mark.parametrize("text", _intent_patterns() + CHAT_SAMPLES)
+def test_regex_tokenizer_matches_treebank(text):
+    # Single-sentence messages: word_tokenize == Treebank tokenizer (Punkt is a no-op)
+    assert nlp.regex_tokenize(text) == NLTKWordTokenizer().tokenize(text)
+
+
+def test_get_tokenizer():
+    assert nlp.get_tokenizer("regex") is nlp.regex_tokenize
+    assert nlp.get_tokenizer(None) is nlp.TOKENIZERS[nlp.DEFAULT_TOKENIZER]
+    custom = str.split
+    assert nlp.get_tokenizer(custom) is custom
+    with pytest.raises(ValueError):
+        nlp.get_tokenizer("spacy")
+
+
+def test_build_training_data_with_regex_tokenizer(monkeypatch, offline_nltk):
+    monkeypatch.setattr(nlp.nltk, "word_tokenize", lambda s: pytest.fail("NLTK tokenizer used"))
+    intents = {"intents": [{"tag": "greet", "patterns": ["Hello, friend!", "hi"]}]}
+    words, classes, docs = nlp.build_training_data(intents, tokenizer="regex")
+    assert words == ["friend", "hello", "hi"]
+    assert docs[0] == (["Hello", ",", "friend", "!"], "greet")
+
+
+def test_analyzer_caches_messages_and_tokens(monkeypatch):
+    calls = []
+
+    class CountingLemmatizer:
+        def lemmatize(self, word):
+            calls.append(word)
+            return word.rstrip("s")
+
+    monkeypatch.setattr(nlp, "lemmatizer", CountingLemmatizer())
+    monkeypatch.setattr(nlp, "ensure_nltk", lambda *resources: None)
+    analyzer = nlp.TextAnalyzer("regex", cache_size=2)
+
+    assert analyzer("Cats and dogs") == ["cat", "and", "dog"]
+    assert analyzer("Cats and dogs") == ["cat", "and", "dog"]
+    assert analyzer("dogs!") == ["dog", "!"]
+    assert calls == ["cats", "and", "dogs", "!"]  # "dogs" reused from the token cache
+
+    stats = analyzer.cache_stats()
+    assert stats["messages"].hits == 1 and stats["messages"].misses == 2
+    assert stats["tokens"].hits == 1
+    assert stats["messages"].currsize == 2 and stats["messages"].maxsize == 2
+    analyzer("x")
+    assert len(analyzer.messages) == 2  # bounded
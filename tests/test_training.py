@@ -1,9 +1,14 @@
 import os
 from pathlib import Path
 import json
+import time
+import numpy as np
 import pytest
 
 from agent_chat.models import nlp
+from agent_chat.models.bundle import read_bundle
+from agent_chat.models.registry import ModelRegistry
+from agent_chat.models.training import TrainingJob
 
 
 @pytest.fixture()
@@ -33,7 +38,434 @@ def test_train_and_save_smoke(tmp_path: Path, tiny_intents, monkeypatch):
         pytest.skip("Keras backend not available in this environment")
 
     # Speed up training dramatically for test
-    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=1, batch_size=8)
+    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=1, batch_size=8, trainer="keras")
     assert artifacts.model_path.exists()
-    assert artifacts.words_path.exists()
-    assert artifacts.classes_path.exists()
+    assert artifacts.model_path.suffix == ".bundle"
+    assert artifacts.keras_path.exists()
+    # Single-file bundle: no pickle sidecars any more
+    assert not list(tmp_path.glob("*.pkl"))
+    # Registered in the manifest, so startup finds it without globbing
+    assert nlp.find_latest_model(tmp_path) == artifacts.model_path
+
+
+def test_training_key_normalizes_intents(tiny_intents):
+    key = nlp.training_key(tiny_intents, epochs=10, batch_size=5)
+    reordered = {"intents": [
+        {**it, "patterns": [f"  {p} " for p in it["patterns"]], "responses": ["changed"]}
+        for it in reversed(tiny_intents["intents"])
+    ]}
+    assert nlp.training_key(reordered, epochs=10, batch_size=5) == key
+    assert nlp.training_key(tiny_intents, epochs=11, batch_size=5) != key
+    assert nlp.training_key(tiny_intents, epochs=10, batch_size=5, tokenizer="regex") != key
+    changed = {"intents": [{**tiny_intents["intents"][0], "patterns": ["something else"]}]}
+    assert nlp.training_key(changed, epochs=10, batch_size=5) != key
+
+
+def test_train_and_save_reuses_matching_artifact(tmp_path: Path, tiny_intents, monkeypatch):
+    bundle = tmp_path / "model_old.bundle"
+    keras_file = tmp_path / "model_old.keras"
+    bundle.write_bytes(b"bundle")
+    keras_file.write_bytes(b"keras")
+    key = nlp.training_key(tiny_intents, epochs=3, batch_size=5, trainer="keras")
+    ModelRegistry.open(tmp_path).register(bundle, files=[keras_file], training_key=key)
+
+    def no_training(*resources):
+        raise AssertionError("should not train")
+
+    monkeypatch.setattr(nlp, "ensure_nltk", no_training)
+    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=3, trainer="keras")
+    assert artifacts.cached
+    assert (artifacts.model_path, artifacts.keras_path) == (bundle, keras_file)
+    # A new label on unchanged intents resolves to the reused model
+    nlp.train_and_save(tiny_intents, tmp_path, epochs=3, trainer="keras", label="v2")
+    assert ModelRegistry.open(tmp_path).by_label("v2").path == bundle.name
+
+    # Different hyperparameters or trainer, a forced run or a deleted artifact all retrain
+    for kwargs in ({"epochs": 4}, {"epochs": 3, "force": True}, {"epochs": 3, "trainer": "numpy"}):
+        with pytest.raises(AssertionError):
+            nlp.train_and_save(tiny_intents, tmp_path, **{"trainer": "keras", **kwargs})
+    keras_file.unlink()
+    with pytest.raises(AssertionError):
+        nlp.train_and_save(tiny_intents, tmp_path, epochs=3, trainer="keras")
+
+
+def test_pattern_cache_only_tokenizes_changed_patterns(tmp_path: Path, tiny_intents, offline_nltk, monkeypatch):
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return text.split()
+
+    monkeypatch.setitem(nlp.TOKENIZERS, "counting", counting)
+    path = tmp_path / nlp.PATTERN_CACHE_NAME
+    cache = nlp.PatternCache.open(path)
+    expected = nlp.build_training_data(tiny_intents, "counting")
+    calls.clear()
+    assert nlp.build_training_data(tiny_intents, "counting", cache=cache) == expected
+    assert sorted(calls) == ["bye", "hello", "hi"]
+    cache.save()
+
+    # A fresh process only tokenizes the edited pattern
+    calls.clear()
+    edited = json.loads(json.dumps(tiny_intents))
+    edited["intents"][1]["patterns"] = ["see you"]
+    cache = nlp.PatternCache.open(path)
+    words, classes, docs = nlp.build_training_data(edited, "counting", cache=cache)
+    assert calls == ["see you"]
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert "see" in words and "bye" not in words
+    X, y = nlp.vectorize_training(words, classes, docs, lemmas=cache.lemmas())
+    assert X.shape == (3, len(words))
+
+    # Another tokenizer never reuses these entries
+    assert nlp.PatternCache.key("hi", "counting") != nlp.PatternCache.key("hi", "regex")
+
+
+# Module level so spawned pattern workers can unpickle them (no NLTK data needed)
+def _offline_ensure(*resources):
+    pass
+
+
+class _CountingEnsure:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *resources):
+        self.calls += 1  # workers get a pickled copy: only the parent's calls count here
+
+
+class _SingularLemmatizer:
+    def lemmatize(self, word):
+        return word[:-1] if word.endswith("s") else word
+
+
+def test_parallel_build_training_data_matches_serial(monkeypatch):
+    ensure = _CountingEnsure()
+    monkeypatch.setattr(nlp, "ensure_nltk", ensure)
+    monkeypatch.setattr(nlp, "lemmatizer", _SingularLemmatizer())
+    intents = {"intents": [
+        {"tag": f"t{i}", "patterns": [f"Hello there friends {i}!", f"what are the cats doing {i}?", "bye"]}
+        for i in range(20)
+    ]}
+    serial = nlp.build_training_data(intents, tokenizer="regex")
+    assert "cat" in serial[0]
+    ensure.calls = 0
+    assert nlp.build_training_data(intents, tokenizer="regex", processes=2, chunk_size=7) == serial
+    assert ensure.calls == 1  # the parent fetches missing data before starting workers
+
+
+def test_train_numpy_learns_separable_data():
+    x = np.eye(4, dtype=np.float32).repeat(5, axis=0)
+    y = np.eye(2, dtype=np.float32)[[0, 0, 1, 1]].repeat(5, axis=0)
+    arch = {**nlp.ARCHITECTURE, "learning_rate": 0.05, "dropout": 0.0}
+    engine, history = nlp.train_numpy(x, y, epochs=60, batch_size=4, architecture=arch, seed=0)
+    assert [layer.activation for layer in engine.layers] == ["relu", "relu", "softmax"]
+    assert engine.predict(x).argmax(axis=1).tolist() == y.argmax(axis=1).tolist()
+    assert history["loss"][-1] < history["loss"][0]
+    assert len(history["accuracy"]) == 60
+    again, _ = nlp.train_numpy(x, y, epochs=60, batch_size=4, architecture=arch, seed=0)
+    assert np.array_equal(again.layers[0].kernel, engine.layers[0].kernel)
+
+
+def test_early_stopping_ends_training_on_plateau():
+    stop = nlp.EarlyStopping(patience=2, min_delta=0.01)
+    assert [stop(loss, acc) for loss, acc in [(1.0, 0.5), (0.5, 0.9), (0.495, 0.9), (0.5, 0.8)]] == \
+        [False, False, False, True]
+    # Accuracy gains below min_delta do not reset the wait either
+    stop = nlp.EarlyStopping(patience=2, min_delta=0.01)
+    assert [stop(1.0, acc) for acc in (0.5, 0.505, 0.509)] == [False, False, True]
+    assert nlp.EarlyStopping().patience == nlp.EARLY_STOPPING_PATIENCE
+    x = np.eye(4, dtype=np.float32).repeat(5, axis=0)
+    y = np.eye(2, dtype=np.float32)[[0, 0, 1, 1]].repeat(5, axis=0)
+    arch = {**nlp.ARCHITECTURE, "learning_rate": 0.05, "dropout": 0.0}
+    stopper = nlp.EarlyStopping(patience=3)
+    _, history = nlp.train_numpy(x, y, epochs=1000, batch_size=4, architecture=arch, seed=0,
+                                 early_stopping=stopper)
+    assert len(history["loss"]) == stopper.epochs_run < 1000
+
+
+def test_auto_batch_size_grows_with_the_corpus():
+    assert nlp.auto_batch_size(20) == nlp.AUTO_BATCH_MIN
+    assert nlp.auto_batch_size(5000) == 128
+    assert nlp.auto_batch_size(10 ** 7) == nlp.AUTO_BATCH_MAX
+    assert nlp.scaled_architecture(20)["learning_rate"] == pytest.approx(4 * nlp.ARCHITECTURE["learning_rate"])
+    assert nlp.scaled_architecture(nlp.AUTO_BATCH_MAX)["learning_rate"] == \
+        pytest.approx(nlp.MAX_LR_SCALE * nlp.ARCHITECTURE["learning_rate"])
+
+
+def test_train_and_save_numpy_writes_loadable_bundle(tmp_path: Path, tiny_intents, offline_nltk):
+    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=5, trainer="numpy", seed=0)
+    assert artifacts.model_path.suffix == ".bundle"
+    assert artifacts.keras_path is None and not list(tmp_path.glob("*.keras"))
+    model = nlp.load_artifacts(artifacts.model_path)
+    assert model.predict_tag("hello") in {"greet", "bye"}
+    entry = ModelRegistry.open(tmp_path).latest()
+    assert entry.meta["trainer"] == "numpy" and entry.accuracy is not None
+    # "auto" picks NumPy for small corpora
+    assert nlp.resolve_trainer("auto", tiny_intents) == "numpy"
+    with pytest.raises(ValueError):
+        nlp.resolve_trainer("torch", tiny_intents)
+
+
+def test_stream_batches_cover_the_corpus_once():
+    features = [(0,), (1, 2), (), (2,), (0, 2)]
+    labels = np.array([0, 1, 1, 0, 1])
+    batches = list(nlp.stream_batches(features, labels, 3, 2, 2, np.random.default_rng(0)))
+    assert [xb.shape for xb, _ in batches] == [(2, 3), (2, 3), (1, 3)]
+    x = np.concatenate([xb for xb, _ in batches])
+    y = np.concatenate([yb for _, yb in batches])
+    dense = nlp.bags_from_indices(features, 3)
+    rows = sorted(zip(x.tolist(), y.argmax(axis=1).tolist()))
+    assert rows == sorted(zip(dense.tolist(), labels.tolist()))
+
+
+def test_prefetch_keeps_order_and_reraises():
+    assert list(nlp.prefetch(iter(range(50)), depth=3)) == list(range(50))
+
+    def failing():
+        yield 1
+        raise RuntimeError("featurization failed")
+
+    out = nlp.prefetch(failing())
+    assert next(out) == 1
+    with pytest.raises(RuntimeError, match="featurization failed"):
+        next(out)
+
+
+def test_train_and_save_streaming_numpy(tmp_path: Path, tiny_intents, offline_nltk, monkeypatch):
+    def no_dense(*args, **kwargs):
+        raise AssertionError("streaming must not build the dense matrix")
+
+    monkeypatch.setattr(nlp, "vectorize_training", no_dense)
+    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=3, batch_size=2, trainer="numpy",
+                                   streaming=True, seed=0)
+    model = nlp.load_artifacts(artifacts.model_path)
+    assert model.predict_tag("bye") in {"greet", "bye"}
+    assert ModelRegistry.open(tmp_path).latest().meta["streaming"] is True
+
+
+def test_train_and_save_hashing_ships_no_vocabulary(tmp_path: Path, tiny_intents, offline_nltk):
+    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=5, trainer="numpy", seed=0, hash_dim=64)
+    assert len(read_bundle(artifacts.model_path)["words"]) == 0
+    model = nlp.load_artifacts(artifacts.model_path)
+    assert isinstance(model.index, nlp.HashingIndex) and len(model.index) == 64
+    assert model.model.layers[0].kernel.shape[0] == 64
+    assert model.predict_tag("hello") in {"greet", "bye"}
+    assert model.features("hello!") == model.features("hello")
+    assert ModelRegistry.open(tmp_path).latest().vocab_size == 64
+    # A different width is a different training run
+    again = nlp.train_and_save(tiny_intents, tmp_path, epochs=5, trainer="numpy", seed=0, hash_dim=32)
+    assert not again.cached
+
+
+def test_warm_start_layers_follow_words_and_classes():
+    rng = np.random.default_rng(0)
+    layers = [nlp.DenseLayer(rng.normal(size=(3, 4)).astype(np.float32), np.ones(4, np.float32), "relu"),
+              nlp.DenseLayer(rng.normal(size=(4, 2)).astype(np.float32), np.arange(2, dtype=np.float32), "softmax")]
+    previous = nlp.IntentModel(model=nlp.NumpyDenseModel(layers), words=["bye", "hello", "hi"],
+                               classes=["bye", "greet"])
+    arch = {**nlp.ARCHITECTURE, "hidden": [4]}
+    new = nlp.warm_start_layers(previous, nlp.VocabIndex(["bye", "hello", "hey", "hi"]),
+                                ["bye", "greet", "thanks"], architecture=arch)
+    assert new[0].kernel.shape == (4, 4) and new[-1].kernel.shape == (4, 3)
+    assert np.array_equal(new[0].kernel[[0, 1, 3]], layers[0].kernel)
+    assert not new[0].kernel[2].any() and not new[-1].kernel[:, 2].any()
+    assert np.array_equal(new[-1].kernel[:, :2], layers[1].kernel)
+    # Other hidden sizes or featurizers cannot share weights
+    assert nlp.warm_start_layers(previous, nlp.VocabIndex(["hi"]), ["bye"]) is None
+    assert nlp.warm_start_layers(previous, nlp.HashingIndex(8), ["bye"], architecture=arch) is None
+
+
+def test_train_and_save_warm_start_fine_tunes(tmp_path: Path, tiny_intents, offline_nltk):
+    first = nlp.train_and_save(tiny_intents, tmp_path, epochs=30, trainer="numpy", seed=0)
+    grown = {"intents": [*tiny_intents["intents"],
+                         {"tag": "thanks", "patterns": ["thanks a lot"], "responses": ["np"]}]}
+    second = nlp.train_and_save(grown, tmp_path, epochs=30, trainer="numpy", seed=0,
+                                warm_start=first.model_path, warm_epochs=4)
+    assert second.warm_started and not first.warm_started
+    model = nlp.load_artifacts(second.model_path)
+    assert second.model_path != first.model_path
+    assert sorted(model.classes) == ["bye", "greet", "thanks"]
+    entry = ModelRegistry.open(tmp_path).latest()
+    assert entry.meta["epochs"] == 4 and entry.meta["warm_start"] == first.model_path.name
+    # Fine-tuning from a model already trained on these intents is a no-op
+    again = nlp.train_and_save(grown, tmp_path, epochs=30, trainer="numpy", seed=0,
+                               warm_start=second.model_path, warm_epochs=4)
+    assert again.cached and again.model_path == second.model_path
+    # ...but a fine-tune never stands in for a from-scratch run of the same intents
+    cold = nlp.train_and_save(grown, tmp_path, epochs=30, trainer="numpy", seed=0)
+    assert not cold.cached and cold.model_path != second.model_path
+
+
+def test_train_and_save_adaptive_records_epochs_run(tmp_path: Path, tiny_intents, offline_nltk):
+    artifacts = nlp.train_and_save(tiny_intents, tmp_path, epochs=500, batch_size=None, patience=3,
+                                   trainer="numpy", seed=0)
+    meta = read_bundle(artifacts.model_path).meta
+    assert meta["batch_size"] == nlp.AUTO_BATCH_MIN
+    assert 3 <= meta["epochs_run"] < 500 and meta["train_seconds"] >= 0
+    entry = ModelRegistry.open(tmp_path).latest()
+    assert entry.meta["epochs_run"] == meta["epochs_run"] and entry.meta["epochs"] == 500
+
+
+def test_train_and_save_reports_progress_and_cancels(tmp_path: Path, tiny_intents, offline_nltk):
+    reports = []
+    nlp.train_and_save(tiny_intents, tmp_path, epochs=4, trainer="numpy", seed=0, progress=reports.append)
+    stages = [p.stage for p in reports]
+    assert stages[0] == "prepare" and stages[-1] == "save" and stages.count("train") == 5
+    assert stages == sorted(stages, key=list(nlp.TRAINING_STAGES).index)
+    assert [p.epoch for p in reports if p.stage == "train"] == [0, 1, 2, 3, 4]
+    assert reports[-2].eta == pytest.approx(0.0) and reports[-2].loss is not None
+    assert [p.fraction for p in reports] == sorted(p.fraction for p in reports)
+
+    def cancel_at_epoch_2(p):
+        if p.epoch == 2:
+            raise nlp.TrainingCancelled()
+
+    with pytest.raises(nlp.TrainingCancelled):
+        nlp.train_and_save(tiny_intents, tmp_path / "cancelled", epochs=50, trainer="numpy", progress=cancel_at_epoch_2)
+    assert not list((tmp_path / "cancelled").glob("*.bundle"))
+
+
+def test_build_training_data_checks_in_after_every_chunk(offline_nltk):
+    intents = {"intents": [{"tag": "t", "patterns": [f"pattern number {i}" for i in range(10)]}]}
+    calls = []
+    nlp.build_training_data(intents, "regex", chunk_size=3, on_chunk=lambda: calls.append(1))
+    assert len(calls) == 4
+
+    def cancel():
+        raise nlp.TrainingCancelled()
+
+    with pytest.raises(nlp.TrainingCancelled):
+        nlp.build_training_data(intents, "regex", chunk_size=3, on_chunk=cancel)
+
+
+# Stand-ins for train_and_save in the spawned process (NLTK data is not patched there)
+def _fake_training(intents, out_dir, progress, epochs=3, **_):
+    for epoch in range(1, epochs + 1):
+        progress(nlp.TrainingProgress("train", epoch, epochs, loss=1.0 / epoch, accuracy=0.5))
+    return nlp.IntentArtifacts(model_path=Path(out_dir) / "model.bundle")
+
+
+def _endless_training(intents, out_dir, progress, **_):
+    epoch = 0
+    while True:
+        epoch += 1
+        progress(nlp.TrainingProgress("train", epoch, 10 ** 6))
+        time.sleep(0.02)
+
+
+def _stuck_training(intents, out_dir, progress, **_):
+    time.sleep(60)
+
+
+def _saving_training(intents, out_dir, progress, **_):
+    progress(nlp.TrainingProgress("train", 1, 1))
+    progress(nlp.TrainingProgress("save", 1, 1))
+    time.sleep(1.0)  # writing files: must not be cut short
+    return nlp.IntentArtifacts(model_path=Path(out_dir) / "saved.bundle")
+
+
+def _spawning_training(intents, out_dir, progress, **_):
+    import subprocess
+    import sys
+
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    (Path(out_dir) / "grandchild.pid").write_text(str(child.pid))
+    time.sleep(60)
+
+
+def _pooled_training(intents, out_dir, progress, processes=None, **_):
+    # Tokenizer pool inside the training process, as train_and_save(processes=...) does
+    nlp.ensure_nltk = _offline_ensure
+    nlp.lemmatizer = _SingularLemmatizer()
+    words, classes, documents = nlp.build_training_data(intents, "regex", processes=processes)
+    progress(nlp.TrainingProgress("train", 1, 1))
+    return nlp.IntentArtifacts(model_path=Path(out_dir) / f"{len(documents)}.bundle")
+
+
+def _failing_training(intents, out_dir, progress, **_):
+    raise ValueError("Intents are empty or invalid; cannot train.")
+
+
+def test_training_job_streams_progress(tmp_path: Path):
+    job = TrainingJob.start({}, str(tmp_path), target=_fake_training, epochs=4)
+    artifacts = job.result(timeout=60)
+    assert artifacts.model_path == tmp_path / "model.bundle"
+    assert job.progress.epoch == 4 and job.pid is not None
+
+
+def test_training_job_can_run_a_tokenizer_pool(tmp_path: Path):
+    patterns = [f"what are the cats doing {i}?" for i in range(2500)]  # more than one 2048-pattern chunk
+    job = TrainingJob.start({"intents": [{"tag": "cats", "patterns": patterns}]}, str(tmp_path),
+                            target=_pooled_training, processes=2)
+    assert job.result(timeout=120).model_path.name == "2500.bundle"
+
+
+def test_training_job_terminate_stops_a_running_job(tmp_path: Path):
+    job = TrainingJob.start({}, str(tmp_path), target=_stuck_training)
+    job.terminate()
+    assert job.done and job.cancelled and not job._process.is_alive()
+
+
+def test_training_job_cancel_and_errors(tmp_path: Path):
+    job = TrainingJob.start({}, str(tmp_path), target=_endless_training)
+    while not job.poll(timeout=30):
+        pass
+    job.cancel()
+    with pytest.raises(nlp.TrainingCancelled):
+        job.result(timeout=60)
+    assert job.cancelled
+
+    # A child that never reports is terminated after the grace period
+    stuck = TrainingJob.start({}, str(tmp_path), target=_stuck_training)
+    stuck.cancel(grace=0.5)
+    with pytest.raises(nlp.TrainingCancelled):
+        stuck.result(timeout=60)
+
+    failing = TrainingJob.start({}, str(tmp_path), target=_failing_training)
+    with pytest.raises(RuntimeError, match="cannot train"):
+        failing.result(timeout=60)
+
+
+def test_train_and_save_gc_spares_protected_models(tmp_path: Path, tiny_intents, offline_nltk):
+    served = nlp.train_and_save(tiny_intents, tmp_path, epochs=2, trainer="numpy", seed=0)
+    nlp.train_and_save(tiny_intents, tmp_path, epochs=2, trainer="numpy", seed=0, force=True, keep=1,
+                       protect=[served.model_path])
+    assert served.model_path.exists()
+    dropped = nlp.train_and_save(tiny_intents, tmp_path, epochs=2, trainer="numpy", seed=0, force=True, keep=1,
+                                 protect=[served.model_path])
+    assert served.model_path.exists() and dropped.model_path.exists()
+    assert len(list(tmp_path.glob("*.bundle"))) == 2
+
+
+def test_training_job_finishes_a_run_that_is_saving(tmp_path: Path):
+    job = TrainingJob.start({}, str(tmp_path), target=_saving_training)
+    while not job.saving:
+        job.poll(timeout=0.1)
+    job.cancel(grace=0.1)
+    assert job.result(timeout=60).model_path == tmp_path / "saved.bundle"
+    assert not job.cancelled
+
+
+def test_training_job_terminate_stops_the_process_group(tmp_path: Path):
+    job = TrainingJob.start({}, str(tmp_path), target=_spawning_training)
+    pid_file = tmp_path / "grandchild.pid"
+    deadline = time.monotonic() + 60
+    while not pid_file.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    grandchild = int(pid_file.read_text())
+    job.cancel(grace=0.2)
+    with pytest.raises(nlp.TrainingCancelled):
+        job.result(timeout=60)
+    for _ in range(100):
+        try:
+            os.waitpid(grandchild, os.WNOHANG)  # not ours: raises ChildProcessError
+        except ChildProcessError:
+            pass
+        try:
+            os.kill(grandchild, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("grandchild process survived the cancel")
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from agent_chat.models import nlp
+from agent_chat.models.workers import SharedModel, WorkerPool, attach
+
+
+@pytest.fixture()
+def intent_model():
+    rng = np.random.default_rng(1)
+    words = ["bye", "hello", "hi", "name", "you", "your"]
+    layers = [
+        nlp.DenseLayer(rng.normal(size=(6, 8)).astype(np.float32), rng.normal(size=8).astype(np.float32), "relu"),
+        nlp.DenseLayer(rng.normal(size=(8, 3)).astype(np.float32), rng.normal(size=3).astype(np.float32), "softmax"),
+    ]
+    return nlp.IntentModel(model=nlp.NumpyDenseModel(layers), words=words, classes=["greet", "bye", "name"])
+
+
+def test_attach_shares_arrays_without_copy(intent_model, offline_nltk):
+    shared = SharedModel(intent_model)
+    try:
+        shm, attached = attach(shared.spec)
+        kernel = attached.model.layers[0].kernel
+        assert not kernel.flags.owndata and not kernel.flags.writeable
+        assert isinstance(attached.index, nlp.SortedVocabIndex)
+        assert attached.classes == intent_model.classes
+        sentences = ["hello you", "bye", "your name", "unknown words"]
+        np.testing.assert_allclose(attached.predict_proba(sentences), intent_model.predict_proba(sentences))
+        del attached, kernel
+        shm.close()
+    finally:
+        shared.close()
+
+
+def test_worker_pool_starts_processes(intent_model):
+    with WorkerPool(intent_model, processes=2) as pool:
+        pids = pool.warm_up()
+        assert 1 <= len(pids) <= 2
+        assert pool.shared_bytes > 0
+        assert pool.predict_tags([]) == []
+
+
+def test_worker_pool_matches_in_process(intent_model):
+    # Regex tokenizer + lemma table: the spawned workers need no NLTK data
+    model = nlp.IntentModel(model=intent_model.model, words=intent_model.words, classes=intent_model.classes,
+                            lemmas={"byes": "bye"}, tokenizer="regex")
+    sentences = ["hello", "bye byes", "what is your name", "hi you"] * 10
+    expected = model.predict_tags(sentences)
+    with WorkerPool(model, processes=2) as pool:
+        got = pool.predict_tags(sentences)
+        assert [t for t, _ in got] == [t for t, _ in expected]
+        assert [p for _, p in got] == pytest.approx([p for _, p in expected], abs=1e-5)
+        assert pool.predict_tag("hello") == expected[0][0]
+
+
+def test_attach_keeps_quantized_weights_compressed(intent_model, offline_nltk):
+    quantized = nlp.IntentModel(
+        model=nlp.NumpyDenseModel([nlp.quantize_layer(l, "int8") for l in intent_model.model.layers]),
+        words=intent_model.words,
+        classes=intent_model.classes,
+    )
+    shared = SharedModel(quantized)
+    try:
+        shm, attached = attach(shared.spec)
+        assert attached.model.layers[0].kernel.dtype == np.int8
+        sentences = ["hello you", "bye"]
+        np.testing.assert_allclose(attached.predict_proba(sentences), quantized.predict_proba(sentences))
+        del attached
+        shm.close()
+    finally:
+        shared.close()
+